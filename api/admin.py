@@ -2,7 +2,8 @@ from django.contrib import admin
 from django.contrib.auth import get_user_model
 from django.contrib.auth.admin import UserAdmin
 
-from .models import Categories, Comment, Genres, Review, Titles
+from .models import Categories, Comment, EmailOutbox, Genres, Review, Titles
+from .search import COMMENTS_FTS, REVIEWS_FTS, filter_matching
 
 User = get_user_model()
 
@@ -20,6 +21,23 @@ class MyUserAdmin(UserAdmin):
     )
 
 
+class FullTextSearchMixin:
+    """
+    Поиск в админке по полнотекстовому индексу ``fts_table`` вместо
+    icontains по всей таблице.
+    """
+    fts_table = None
+    search_fields = ('text', )
+    # Не считать все записи таблицы рядом с числом найденных.
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return filter_matching(queryset, self.fts_table, search_term,
+                               self.search_fields), False
+
+
 class CategoriesAdmin(admin.ModelAdmin):
     list_display = ('name', 'slug')
     search_fields = ('name', 'slug')
@@ -27,9 +45,10 @@ class CategoriesAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('review', 'text', 'author', 'pub_date')
-    search_fields = ('review', 'text', 'author',)
+    list_select_related = ('review', 'author')
+    fts_table = COMMENTS_FTS
     list_filter = ('review', 'author',)
     empty_value_display = '-пусто-'
 
@@ -48,16 +67,25 @@ class TitlesAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
-class ReviewAdmin(admin.ModelAdmin):
+class ReviewAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('title', 'text', 'author', 'pub_date', 'score')
-    search_fields = ('title', 'text', 'author')
+    list_select_related = ('title', 'author')
+    fts_table = REVIEWS_FTS
     list_filter = ('title', 'author')
     empty_value_display = '-пусто-'
 
 
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ('recipient', 'subject', 'created', 'sent_at', 'attempts')
+    search_fields = ('recipient',)
+    list_filter = ('sent_at',)
+    empty_value_display = '-пусто-'
+
+
 admin.site.register(User, MyUserAdmin)
 admin.site.register(Categories, CategoriesAdmin)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Genres, GenresAdmin)
 admin.site.register(Titles, TitlesAdmin)
 admin.site.register(Review, ReviewAdmin)
+admin.site.register(EmailOutbox, EmailOutboxAdmin)
@@ -1,5 +1,36 @@
 from django.apps import AppConfig
+from django.core import checks
+from django.db.backends.signals import connection_created
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
 
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        from .checks import check_token_version_cache
+        from .models import Categories, Genres, Review, Titles
+        from .signals import (group_post_delete, group_post_save,
+                              review_post_delete, review_post_save,
+                              review_pre_save, set_sqlite_pragmas,
+                              title_post_delete, title_pre_delete)
+        checks.register(check_token_version_cache)
+        connection_created.connect(set_sqlite_pragmas,
+                                   dispatch_uid='api_sqlite_pragmas')
+        pre_delete.connect(title_pre_delete, sender=Titles,
+                           dispatch_uid='api_title_pre_delete')
+        post_delete.connect(title_post_delete, sender=Titles,
+                            dispatch_uid='api_title_post_delete')
+        post_delete.connect(review_post_delete, sender=Review,
+                            dispatch_uid='api_review_post_delete')
+        pre_save.connect(review_pre_save, sender=Review,
+                         dispatch_uid='api_review_pre_save')
+        post_save.connect(review_post_save, sender=Review,
+                          dispatch_uid='api_review_post_save')
+        for model in (Categories, Genres):
+            label = model._meta.model_name
+            post_save.connect(group_post_save, sender=model,
+                              dispatch_uid=f'api_{label}_post_save')
+            post_delete.connect(group_post_delete, sender=model,
+                                dispatch_uid=f'api_{label}_post_delete')
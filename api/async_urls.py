@@ -0,0 +1,26 @@
+from django.urls import path
+
+from . import views
+from .async_views import DETAIL_ACTIONS, LIST_ACTIONS, async_view
+
+# Пути чтения, которые под ASGI обслуживаются асинхронно. Остальные
+# запросы проходят дальше, к api.urls.
+urlpatterns = [
+    path('v1/categories/',
+         async_view(views.CategoriesView, LIST_ACTIONS)),
+    path('v1/genres/',
+         async_view(views.GenreViews, LIST_ACTIONS)),
+    path('v1/titles/',
+         async_view(views.TitleViews, LIST_ACTIONS)),
+    path('v1/titles/<int:pk>/',
+         async_view(views.TitleViews, DETAIL_ACTIONS)),
+    path('v1/titles/<int:title_id>/reviews/',
+         async_view(views.ReviewViewSet, LIST_ACTIONS)),
+    path('v1/titles/<int:title_id>/reviews/<int:pk>/',
+         async_view(views.ReviewViewSet, DETAIL_ACTIONS)),
+    path('v1/titles/<int:title_id>/reviews/<int:review_id>/comments/',
+         async_view(views.CommentViewSet, LIST_ACTIONS)),
+    path('v1/titles/<int:title_id>/reviews/<int:review_id>/comments/'
+         '<int:pk>/',
+         async_view(views.CommentViewSet, DETAIL_ACTIONS)),
+]
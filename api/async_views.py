@@ -0,0 +1,38 @@
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from rest_framework import permissions
+
+
+def render_response(view, request, *args, **kwargs):
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_view(viewset, actions):
+    """
+    Асинхронная обёртка над viewset. Безопасные запросы выполняются
+    в пуле потоков параллельно, вместе с рендерингом ответа, так что цикл
+    событий не блокируется. Изменяющие запросы, как и синхронные
+    представления под ASGI, выполняются в общем потоке.
+    """
+    view = viewset.as_view(actions)
+
+    async def wrapper(request, *args, **kwargs):
+        thread_sensitive = request.method not in permissions.SAFE_METHODS
+        return await sync_to_async(
+            render_response, thread_sensitive=thread_sensitive
+        )(view, request, *args, **kwargs)
+
+    wrapper.csrf_exempt = True
+    return wrapper
+
+
+LIST_ACTIONS = {'get': 'list', 'post': 'create'}
+DETAIL_ACTIONS = {'get': 'retrieve', 'put': 'update',
+                  'patch': 'partial_update', 'delete': 'destroy'}
@@ -0,0 +1,71 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import CustomUser, Roles, token_version_key
+
+TOKEN_CLAIMS = ('username', 'role', 'is_staff', 'is_superuser',
+                'token_version')
+
+
+def add_token_claims(token, user):
+    for claim in TOKEN_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+def get_token_version(user_id, refresh=False):
+    """
+    Версия токенов активного пользователя, None - пользователя нет.
+    Без TOKEN_VERSION_CACHE_SECONDS читается из базы по первичному ключу.
+    """
+    seconds = settings.TOKEN_VERSION_CACHE_SECONDS
+    key = token_version_key(user_id)
+    version = None if refresh or not seconds else cache.get(key)
+    if version is None:
+        version = (CustomUser.objects
+                   .filter(pk=user_id, is_active=True)
+                   .values_list('token_version', flat=True).first())
+        if version is not None and seconds:
+            cache.set(key, version, seconds)
+    return version
+
+
+class ClaimsUser(TokenUser):
+    """Пользователь, собранный из утверждений токена без запроса к базе."""
+
+    @cached_property
+    def role(self):
+        return self.token['role']
+
+    @property
+    def is_admin(self):
+        return self.role == Roles.ADMIN or self.is_staff or self.is_superuser
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Токены с ролью в утверждениях проверяются по версии токенов
+    пользователя (get_token_version), остальные - обычным поиском
+    пользователя в базе.
+    """
+
+    def get_user(self, validated_token):
+        if any(claim not in validated_token for claim in TOKEN_CLAIMS):
+            return super().get_user(validated_token)
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        version = get_token_version(user_id)
+        if version != validated_token['token_version']:
+            # Кэш мог устареть, окончательное решение - по базе.
+            version = get_token_version(user_id, refresh=True)
+        if version is None:
+            raise AuthenticationFailed('User not found',
+                                       code='user_not_found')
+        if version != validated_token['token_version']:
+            raise AuthenticationFailed('Token has been revoked',
+                                       code='token_revoked')
+        return ClaimsUser(validated_token)
@@ -0,0 +1,257 @@
+import heapq
+import time
+from bisect import bisect_left, bisect_right
+from collections import Counter
+
+from .memory_index import MemoryIndex, normalize
+from .models import Categories, Genres, Titles
+
+KINDS = ('titles', 'genres', 'categories')
+# Результаты для префиксов, под которые попадает много ключей,
+# запоминаются на MEMO_SECONDS: новые оценки могут появиться в них
+# с этой задержкой, новые и удалённые названия - сразу.
+MEMO_MIN_MATCHES = 1000
+MEMO_SECONDS = 10
+
+
+def word_keys(name):
+    """Ключи для поиска с начала каждого слова названия."""
+    words = normalize(name).split()
+    return {' '.join(words[start:]) for start in range(len(words))}
+
+
+def title_rank(pk, score_sum, review_count):
+    rating = score_sum / review_count if review_count else 0
+    return rating, review_count, -pk
+
+
+class SortedKeys:
+    """Отсортированные ключи и параллельный массив pk."""
+
+    def __init__(self, pairs=()):
+        pairs = sorted(pairs)
+        self.texts = [text for text, _ in pairs]
+        self.pks = [pk for _, pk in pairs]
+
+    def add(self, pk, name):
+        for text in word_keys(name):
+            position = bisect_left(self.texts, text)
+            self.texts.insert(position, text)
+            self.pks.insert(position, pk)
+
+    def remove(self, pk, name):
+        for text in word_keys(name):
+            start = bisect_left(self.texts, text)
+            end = bisect_right(self.texts, text, start)
+            if pk in self.pks[start:end]:
+                position = self.pks.index(pk, start, end)
+                del self.texts[position]
+                del self.pks[position]
+
+    def match(self, prefix):
+        """pk всех ключей, начинающихся с ``prefix``."""
+        start = bisect_left(self.texts, prefix)
+        end = bisect_left(self.texts, prefix + '\U0010ffff', start)
+        return self.pks[start:end]
+
+
+class CompletionIndex(MemoryIndex):
+    """
+    Автодополнение названий произведений, жанров и категорий по началу
+    любого слова. Поиск - bisect по отсортированным ключам, отбор лучших -
+    heapq по заранее посчитанному рангу: для произведений это рейтинг и
+    число отзывов, для жанров и категорий - число произведений.
+    """
+    rebuild_setting = 'AUTOCOMPLETE_REBUILD_SECONDS'
+
+    def __init__(self):
+        super().__init__()
+        # Произведения, рейтинг которых нужно перечитать из базы.
+        self._stale_ratings = set()
+        self.install(self.empty_state())
+
+    def empty_state(self):
+        return {
+            'keys': {kind: SortedKeys() for kind in KINDS},
+            'titles': {},
+            'ranks': {},
+            'groups': {'genres': {}, 'categories': {}},
+            'counts': {'genres': Counter(), 'categories': Counter()},
+        }
+
+    def install(self, state):
+        self._keys = state['keys']
+        self._titles = state['titles']
+        self._ranks = state['ranks']
+        self._groups = state['groups']
+        self._counts = state['counts']
+        self._memo = {}
+
+    def load(self):
+        state = self.empty_state()
+        pairs = {kind: [] for kind in KINDS}
+        for kind, model in (('genres', Genres), ('categories', Categories)):
+            for pk, name, slug in model.objects.values_list(
+                    'id', 'name', 'slug').iterator():
+                state['groups'][kind][pk] = (name, slug)
+                pairs[kind].extend((key, pk) for key in word_keys(name))
+        genre_ids = {}
+        for title_id, genre_id in (Titles.genre.through.objects
+                                   .values_list('titles_id', 'genres_id')
+                                   .iterator()):
+            genre_ids.setdefault(title_id, []).append(genre_id)
+        counts = state['counts']
+        for pk, name, category_id, score_sum, review_count in (
+                Titles.objects.values_list(
+                    'id', 'name', 'category_id', 'score_sum',
+                    'review_count').iterator()):
+            genres = tuple(genre_ids.get(pk, ()))
+            state['titles'][pk] = [name, category_id, genres,
+                                   score_sum, review_count]
+            state['ranks'][pk] = title_rank(pk, score_sum, review_count)
+            pairs['titles'].extend((key, pk) for key in word_keys(name))
+            counts['categories'][category_id] += 1
+            counts['genres'].update(genres)
+        state['keys'] = {kind: SortedKeys(pairs[kind]) for kind in KINDS}
+        return state
+
+    def complete(self, prefix, limit=10):
+        """Возвращает до ``limit`` лучших совпадений каждого вида."""
+        self.ensure_built()
+        prefix = normalize(prefix).strip()
+        if not prefix:
+            return {kind: [] for kind in KINDS}
+        now = time.monotonic()
+        with self._lock:
+            memo = self._memo.get((prefix, limit))
+            if memo is not None and now - memo[0] < MEMO_SECONDS:
+                return memo[1]
+            matches = self._keys['titles'].match(prefix)
+            titles = heapq.nlargest(limit, set(matches),
+                                    key=self._ranks.__getitem__)
+            result = {
+                'titles': [self._title_item(pk) for pk in titles],
+                'genres': self._group_items('genres', prefix, limit),
+                'categories': self._group_items('categories', prefix, limit),
+            }
+            if len(matches) >= MEMO_MIN_MATCHES:
+                self._memo[(prefix, limit)] = (now, result)
+            return result
+
+    def _title_item(self, pk):
+        name, _, _, score_sum, review_count = self._titles[pk]
+        rating = score_sum / review_count if review_count else None
+        return {'id': pk, 'name': name, 'rating': rating}
+
+    def _group_items(self, kind, prefix, limit):
+        counts = self._counts[kind]
+        best = heapq.nlargest(limit, set(self._keys[kind].match(prefix)),
+                              key=lambda pk: (counts[pk], -pk))
+        return [{'name': self._groups[kind][pk][0],
+                 'slug': self._groups[kind][pk][1]} for pk in best]
+
+    def _forget_title(self, pk):
+        old = self._titles.pop(pk, None)
+        if old is not None:
+            name, category_id, genre_ids, _, _ = old
+            self._keys['titles'].remove(pk, name)
+            self._counts['categories'][category_id] -= 1
+            self._counts['genres'].subtract(genre_ids)
+        return old
+
+    def set_title(self, pk, name, category_id, genre_ids=None):
+        """Добавляет или обновляет произведение; None - жанры не менялись."""
+        self.apply(self._set_title, pk, name, category_id, genre_ids)
+
+    def _set_title(self, pk, name, category_id, genre_ids):
+        old = self._forget_title(pk) or [None, None, (), 0, 0]
+        if genre_ids is None:
+            genre_ids = old[2]
+        genre_ids = tuple(genre_ids)
+        self._titles[pk] = [name, category_id, genre_ids, *old[3:]]
+        self._ranks[pk] = title_rank(pk, *old[3:])
+        self._keys['titles'].add(pk, name)
+        self._counts['categories'][category_id] += 1
+        self._counts['genres'].update(genre_ids)
+        self._memo = {}
+
+    def remove_title(self, pk):
+        self.apply(self._remove_title, pk)
+
+    def _remove_title(self, pk):
+        if self._forget_title(pk) is not None:
+            self._ranks.pop(pk, None)
+            self._memo = {}
+
+    def shift_rating(self, pk, score_delta, count_delta=0):
+        """
+        То же изменение, что Titles.shift_rating, без запроса к базе.
+        Сдвиг нельзя повторить, не зная, видела ли его база при чтении,
+        поэтому рейтинг такого произведения затем перечитывается.
+        """
+        self.apply(self._shift_rating, pk, score_delta, count_delta,
+                   replay=self._mark_stale_rating)
+
+    def _shift_rating(self, pk, score_delta, count_delta):
+        title = self._titles.get(pk)
+        if title is None:
+            return
+        title[3] += score_delta
+        title[4] += count_delta
+        self._ranks[pk] = title_rank(pk, title[3], title[4])
+
+    def _mark_stale_rating(self, pk, score_delta, count_delta):
+        self._stale_ratings.add(pk)
+
+    def after_rebuild(self):
+        # Рейтинги, сдвинутые во время очередного чтения, снова
+        # оказываются в _stale_ratings и перечитываются.
+        while True:
+            with self._lock:
+                pks, self._stale_ratings = self._stale_ratings, set()
+            if not pks:
+                return
+            ratings = self.read(lambda: list(
+                Titles.objects.filter(pk__in=pks)
+                .values_list('id', 'score_sum', 'review_count')))
+            with self._lock:
+                for pk, score_sum, review_count in ratings:
+                    title = self._titles.get(pk)
+                    if title is not None:
+                        title[3:5] = score_sum, review_count
+                        self._ranks[pk] = title_rank(pk, score_sum,
+                                                     review_count)
+                self._memo = {}
+                self.replay()
+
+    def add_group(self, kind, pk, name, slug):
+        self.apply(self._add_group, kind, pk, name, slug)
+
+    def _add_group(self, kind, pk, name, slug):
+        old = self._groups[kind].get(pk)
+        if old is not None:
+            self._keys[kind].remove(pk, old[0])
+        self._groups[kind][pk] = (name, slug)
+        self._keys[kind].add(pk, name)
+        self._memo = {}
+
+    def remove_group(self, kind, pk):
+        self.apply(self._remove_group, kind, pk)
+
+    def _remove_group(self, kind, pk):
+        old = self._groups[kind].pop(pk, None)
+        if old is None:
+            return
+        self._keys[kind].remove(pk, old[0])
+        del self._counts[kind][pk]
+        if kind == 'genres':
+            # Произведения категории удаляются вместе с ней, а из жанра
+            # они только исключаются.
+            for title in self._titles.values():
+                if pk in title[2]:
+                    title[2] = tuple(value for value in title[2]
+                                     if value != pk)
+        self._memo = {}
+
+
+completions = CompletionIndex()
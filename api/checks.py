@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.checks import Error
+
+# Кэши, которые каждый процесс держит у себя.
+LOCAL_CACHES = ('django.core.cache.backends.locmem.LocMemCache', )
+
+
+def check_token_version_cache(app_configs, **kwargs):
+    """
+    Версии токенов можно кэшировать только в общем для процессов кэше:
+    иначе отзыв токенов в одном процессе не виден остальным до истечения
+    TOKEN_VERSION_CACHE_SECONDS.
+    """
+    if (settings.TOKEN_VERSION_CACHE_SECONDS
+            and settings.CACHES['default']['BACKEND'] in LOCAL_CACHES):
+        return [Error(
+            'TOKEN_VERSION_CACHE_SECONDS requires a cache shared between '
+            'processes.',
+            hint='Set TOKEN_VERSION_CACHE_SECONDS = 0 or configure a shared '
+                 'CACHES backend.',
+            id='api.E001',
+        )]
+    return []
@@ -0,0 +1,66 @@
+import csv
+import io
+import json
+
+from .models import Titles
+
+EXPORT_FIELDS = ('id', 'name', 'year', 'category', 'genre', 'rating',
+                 'description')
+
+
+def iter_titles(after=0, chunk_size=1000):
+    """
+    Отдаёт произведения в порядке id пачками по ``chunk_size``, начиная
+    после ``after``. Каждая пачка - два запроса, память не растёт с размером
+    таблицы.
+    """
+    genre_through = Titles.genre.through
+    while True:
+        chunk = list(
+            Titles.objects.filter(id__gt=after).order_by('id')
+            .values_list('id', 'name', 'year', 'category__slug',
+                         'score_sum', 'review_count', 'description')
+            [:chunk_size]
+        )
+        if not chunk:
+            return
+        genres = {}
+        for title_id, slug in (
+                genre_through.objects
+                .filter(titles_id__in=[row[0] for row in chunk])
+                .order_by('genres__slug')
+                .values_list('titles_id', 'genres__slug')):
+            genres.setdefault(title_id, []).append(slug)
+        for (pk, name, year, category, score_sum, review_count,
+             description) in chunk:
+            yield {
+                'id': pk,
+                'name': name,
+                'year': year,
+                'category': category,
+                'genre': genres.get(pk, []),
+                'rating': score_sum / review_count if review_count else None,
+                'description': description,
+            }
+        after = chunk[-1][0]
+
+
+def iter_ndjson(titles):
+    for title in titles:
+        yield json.dumps(title, ensure_ascii=False) + '\n'
+
+
+def iter_csv(titles, chunk_size=8192):
+    """CSV кусками примерно по ``chunk_size`` символов."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    for title in titles:
+        writer.writerow(dict(title, genre=','.join(title['genre'])))
+        if buffer.tell() < chunk_size:
+            continue
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,207 @@
+from collections import Counter
+from itertools import chain
+
+from .memory_index import MemoryIndex
+from .models import Categories, Genres, Titles
+
+FACETS = ('genre', 'category', 'year')
+GROUPS = (('genre', Genres), ('category', Categories))
+# Запомненных результатов для сочетаний фильтров не больше стольких,
+# при переполнении и при любой записи они забываются.
+MEMO_SIZE = 1000
+
+
+def title_terms(category_id, genre_ids, year):
+    """Значения фасетов произведения: пары (фасет, id или год)."""
+    terms = [('genre', pk) for pk in genre_ids]
+    if category_id is not None:
+        terms.append(('category', category_id))
+    if year is not None:
+        terms.append(('year', year))
+    return tuple(terms)
+
+
+class FacetIndex(MemoryIndex):
+    """
+    Число произведений по жанрам, категориям и годам. Для каждого значения
+    фасета хранится множество его произведений и заранее посчитанные
+    счётчики значений остальных фасетов среди них, поэтому ответ без
+    фильтров и с одним фильтром по фасету берётся из счётчиков. Для
+    нескольких фильтров множества пересекаются, и значения считаются
+    по пересечению.
+    """
+    rebuild_setting = 'FACETS_REBUILD_SECONDS'
+
+    def __init__(self):
+        super().__init__()
+        self.install(self.empty_state())
+
+    def empty_state(self):
+        return {
+            'titles': {},
+            'members': {},
+            'pairs': {},
+            'groups': {kind: {} for kind, _ in GROUPS},
+        }
+
+    def install(self, state):
+        self._titles = state['titles']
+        self._members = state['members']
+        self._pairs = state['pairs']
+        self._groups = state['groups']
+        self._slugs = {kind: {slug: pk for pk, (_, slug) in groups.items()}
+                       for kind, groups in self._groups.items()}
+        self._memo = {}
+
+    def load(self):
+        state = self.empty_state()
+        for kind, model in GROUPS:
+            for pk, name, slug in model.objects.values_list(
+                    'id', 'name', 'slug').iterator():
+                state['groups'][kind][pk] = (name, slug)
+        genre_ids = {}
+        for title_id, genre_id in (Titles.genre.through.objects
+                                   .values_list('titles_id', 'genres_id')
+                                   .iterator()):
+            genre_ids.setdefault(title_id, []).append(genre_id)
+        members = state['members']
+        pairs = state['pairs']
+        for pk, category_id, year in Titles.objects.values_list(
+                'id', 'category_id', 'year').iterator():
+            terms = title_terms(category_id, genre_ids.get(pk, ()), year)
+            state['titles'][pk] = terms
+            for term in terms:
+                members.setdefault(term, set()).add(pk)
+                pairs.setdefault(term, Counter()).update(terms)
+        return state
+
+    def counts(self, filters, pks=None):
+        """
+        Число произведений для каждого значения фасетов среди подходящих
+        под ``filters`` (фасет и slug или год) или, если задан ``pks``,
+        среди этих произведений.
+        """
+        self.ensure_built()
+        with self._lock:
+            if pks is not None:
+                return self._result(*self._scan(set(pks)))
+            terms = self._filter_terms(filters)
+            if terms is None:
+                return self._result(Counter(), 0)
+            if not terms:
+                return self._result(
+                    {term: len(members)
+                     for term, members in self._members.items()},
+                    len(self._titles))
+            if len(terms) == 1:
+                term, = terms
+                return self._result(self._pairs.get(term, Counter()),
+                                    len(self._members.get(term, ())))
+            key = tuple(sorted(terms))
+            result = self._memo.get(key)
+            if result is None:
+                sets = sorted((self._members.get(term, set())
+                               for term in terms), key=len)
+                result = self._result(*self._scan(
+                    sets[0].intersection(*sets[1:])))
+                if len(self._memo) >= MEMO_SIZE:
+                    self._memo = {}
+                self._memo[key] = result
+            return result
+
+    def _filter_terms(self, filters):
+        """Значения фасетов из фильтров; None - несуществующий slug."""
+        terms = set()
+        for kind, value in filters.items():
+            if kind in self._slugs:
+                value = self._slugs[kind].get(value)
+                if value is None:
+                    return None
+            terms.add((kind, value))
+        return terms
+
+    def _scan(self, pks):
+        # map и Counter обходят произведения без байт-кода Python.
+        rows = list(map(self._titles.get, pks))
+        counts = Counter(chain.from_iterable(filter(None, rows)))
+        return counts, len(rows) - rows.count(None)
+
+    def _result(self, counts, total):
+        result = {'count': total}
+        for kind, groups in self._groups.items():
+            items = [{'slug': slug, 'name': name,
+                      'count': counts.get((kind, pk), 0)}
+                     for pk, (name, slug) in groups.items()]
+            items.sort(key=lambda item: (-item['count'], item['slug']))
+            result[kind] = items
+        years = sorted(value for kind, value in self._members
+                       if kind == 'year')
+        result['year'] = [
+            {'year': year, 'count': counts.get(('year', year), 0)}
+            for year in years]
+        return result
+
+    def _forget_title(self, pk):
+        terms = self._titles.pop(pk, None)
+        if terms is None:
+            return None
+        for term in terms:
+            members = self._members[term]
+            members.discard(pk)
+            if not members:
+                del self._members[term]
+                del self._pairs[term]
+            else:
+                self._pairs[term].subtract(terms)
+        return terms
+
+    def set_title(self, pk, category_id, genre_ids, year):
+        """Добавляет или обновляет произведение; None - жанры не менялись."""
+        self.apply(self._set_title, pk, category_id, genre_ids, year)
+
+    def _set_title(self, pk, category_id, genre_ids, year):
+        old = self._forget_title(pk) or ()
+        if genre_ids is None:
+            genre_ids = [value for kind, value in old if kind == 'genre']
+        self._add_title(pk, title_terms(category_id, genre_ids, year))
+        self._memo = {}
+
+    def _add_title(self, pk, terms):
+        self._titles[pk] = terms
+        for term in terms:
+            self._members.setdefault(term, set()).add(pk)
+            self._pairs.setdefault(term, Counter()).update(terms)
+
+    def remove_title(self, pk):
+        self.apply(self._remove_title, pk)
+
+    def _remove_title(self, pk):
+        if self._forget_title(pk) is not None:
+            self._memo = {}
+
+    def add_group(self, kind, pk, name, slug):
+        self.apply(self._add_group, kind, pk, name, slug)
+
+    def _add_group(self, kind, pk, name, slug):
+        self._groups[kind][pk] = (name, slug)
+        self._slugs[kind][slug] = pk
+        self._memo = {}
+
+    def remove_group(self, kind, pk):
+        self.apply(self._remove_group, kind, pk)
+
+    def _remove_group(self, kind, pk):
+        old = self._groups[kind].pop(pk, None)
+        if old is None:
+            return
+        if self._slugs[kind].get(old[1]) == pk:
+            del self._slugs[kind][old[1]]
+        term = (kind, pk)
+        for title in list(self._members.get(term, ())):
+            terms = self._forget_title(title)
+            self._add_title(title, tuple(value for value in terms
+                                         if value != term))
+        self._memo = {}
+
+
+title_facets = FacetIndex()
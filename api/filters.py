@@ -1,7 +1,25 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Case, IntegerField, When
 from django_filters import filters
 from django_filters.rest_framework.filterset import FilterSet
 
-from .models import Titles
+from .fuzzy import fuzzy_titles
+from .models import Comment, Review, Titles
+from .search import (COMMENTS_FTS, REVIEWS_FTS, filter_titles, fts_available,
+                     rank_matching, rank_titles)
+
+User = get_user_model()
+
+
+class UserFilter(FilterSet):
+    # Поиск по началу username использует индекс с COLLATE NOCASE,
+    # ?search= ищет по любой части username просмотром таблицы.
+    username = filters.CharFilter(lookup_expr='istartswith')
+
+    class Meta:
+        model = User
+        fields = []
 
 
 class TitleFilter(FilterSet):
@@ -9,9 +27,105 @@ class TitleFilter(FilterSet):
                                lookup_expr='exact')
     category = filters.CharFilter(field_name='category__slug',
                                   lookup_expr='exact')
-    name = filters.CharFilter(field_name='name',
-                              lookup_expr='contains')
+    name = filters.CharFilter(method='filter_name')
+    search = filters.CharFilter(method='filter_search')
+    fuzzy = filters.CharFilter(method='filter_fuzzy')
 
     class Meta:
         model = Titles
         fields = ['year', ]
+
+    def filter_name(self, queryset, name, value):
+        return filter_titles(queryset, value, columns=('name', ))
+
+    def filter_search(self, queryset, name, value):
+        # Полнотекстовый поиск по названию и описанию, результаты
+        # упорядочены по релевантности.
+        return rank_titles(queryset, value)
+
+    def filter_fuzzy(self, queryset, name, value):
+        # Поиск с опечатками по триграммному индексу в памяти, результаты
+        # упорядочены по сходству с запросом.
+        pks = fuzzy_titles.search(value)
+        if not pks:
+            return queryset.none()
+        position = Case(*(When(pk=pk, then=number)
+                          for number, pk in enumerate(pks)),
+                        output_field=IntegerField())
+        return (queryset.filter(pk__in=pks)
+                .annotate(fuzzy_position=position)
+                .order_by('fuzzy_position'))
+
+
+class TextSearchFilter(FilterSet):
+    """
+    Полнотекстовый поиск слов целиком по ``text`` с фрагментами
+    найденного, результаты упорядочены по релевантности. Фильтры из
+    ``key_filters`` (имя фильтра и колонка) проиндексированы вместе
+    с текстом и входят в запрос FTS5, фильтры из ``sql_filters``
+    применяются к найденным записям в SQL.
+    """
+    q = filters.CharFilter(method='filter_q', required=True)
+    author = filters.ModelChoiceFilter(method='filter_key',
+                                       queryset=User.objects.all(),
+                                       to_field_name='username')
+
+    fts_table = None
+    key_filters = {}
+    sql_filters = ()
+
+    def get_keys(self):
+        keys = {}
+        for name, column in self.key_filters.items():
+            value = self.form.cleaned_data.get(name)
+            if value is not None:
+                keys[column] = getattr(value, 'pk', value)
+        return keys
+
+    def filter_q(self, queryset, name, value):
+        keys = self.get_keys()
+        filtered = keys or any(self.form.cleaned_data.get(name) is not None
+                               for name in self.sql_filters)
+        # Без фильтров ранжируются только последние совпадения,
+        # с фильтрами совпадений немного.
+        window = None if filtered else settings.TEXT_SEARCH_WINDOW
+        return rank_matching(queryset, self.fts_table, value, ('text', ),
+                             snippet=True, keys=keys, window=window,
+                             prefix=False)
+
+    def filter_key(self, queryset, name, value):
+        if fts_available():
+            return queryset
+        return queryset.filter(
+            **{self.key_filters[name]: getattr(value, 'pk', value)})
+
+
+class ReviewSearchFilter(TextSearchFilter):
+    title = filters.NumberFilter(method='filter_key')
+
+    fts_table = REVIEWS_FTS
+    key_filters = {'title': 'title_id', 'author': 'author_id'}
+
+    class Meta:
+        model = Review
+        fields = []
+
+
+class CommentSearchFilter(TextSearchFilter):
+    review = filters.NumberFilter(method='filter_key')
+    title = filters.NumberFilter(method='filter_title')
+
+    fts_table = COMMENTS_FTS
+    key_filters = {'review': 'review_id', 'author': 'author_id'}
+    sql_filters = ('title', )
+
+    class Meta:
+        model = Comment
+        fields = []
+
+    def filter_title(self, queryset, name, value):
+        # Произведение в индексе комментариев не хранится. Отзывы
+        # произведения проверяются подзапросом для каждого совпадения,
+        # а не перечисляются в запросе FTS5: их может быть сколько угодно.
+        return queryset.filter(
+            review_id__in=Review.objects.filter(title_id=value).values('id'))
@@ -0,0 +1,169 @@
+import heapq
+import math
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from difflib import SequenceMatcher
+
+from django.conf import settings
+
+from .memory_index import MemoryIndex, normalize
+from .models import Titles
+
+# Кандидатов с наибольшим числом общих триграмм отбирается во столько раз
+# больше, чем нужно результатов; затем их упорядочивает SequenceMatcher.
+RERANK_FACTOR = 2
+# Доля общих с запросом триграмм, начиная с которой совпадение считается
+# близким.
+STRONG_THRESHOLD = 0.6
+# Список триграммы, который во столько раз длиннее числа кандидатов,
+# не просматривается целиком.
+BISECT_RATIO = 4
+
+
+def trigrams(text):
+    """Триграммы слов текста, как в pg_trgm: слово дополняется пробелами."""
+    result = set()
+    for word in normalize(text).split():
+        padded = f'  {word} '
+        result.update(padded[start:start + 3]
+                      for start in range(len(padded) - 2))
+    return result
+
+
+def similarity(query, name):
+    """Лучшее совпадение запроса с отрезком названия из стольких же слов."""
+    words = normalize(name).split()
+    size = max(len(query.split()), 1)
+    matcher = SequenceMatcher(autojunk=False)
+    matcher.set_seq2(query)
+    best = 0
+    for start in range(max(len(words) - size + 1, 1)):
+        matcher.set_seq1(' '.join(words[start:start + size]))
+        best = max(best, matcher.ratio())
+    return best
+
+
+class FuzzyTitleIndex(MemoryIndex):
+    """
+    Нечёткий поиск по названиям произведений: инвертированный индекс
+    триграмм в памяти процесса, списки pk в нём отсортированы.
+    Просматриваются только списки триграмм запроса, а кандидаты берутся
+    из самых коротких из них, поэтому названия, не похожие на запрос,
+    поиск не затрагивает.
+    """
+    rebuild_setting = 'FUZZY_REBUILD_SECONDS'
+
+    def __init__(self):
+        super().__init__()
+        self.install(self.build_state(()))
+
+    @staticmethod
+    def build_state(rows):
+        """Состояние индекса по парам (pk, название) в порядке pk."""
+        postings = {}
+        names = {}
+        for pk, name in rows:
+            names[pk] = name
+            for gram in trigrams(name):
+                posting = postings.get(gram)
+                if posting is None:
+                    posting = postings[gram] = array('I')
+                posting.append(pk)
+        return {'postings': postings, 'names': names}
+
+    def load(self):
+        return self.build_state(
+            Titles.objects.order_by('id').values_list('id', 'name')
+            .iterator())
+
+    def install(self, state):
+        self._postings = state['postings']
+        self._names = state['names']
+
+    def search(self, text, limit=50, threshold=None):
+        """
+        pk произведений, похожих на ``text``, от лучшего к худшему. Если
+        есть близкие совпадения (доля общих триграмм не меньше
+        STRONG_THRESHOLD), возвращаются только они: их поиск затрагивает
+        лишь самые короткие списки.
+        """
+        self.ensure_built()
+        if threshold is None:
+            threshold = settings.FUZZY_THRESHOLD
+        query = trigrams(text)
+        if not query:
+            return []
+        with self._lock:
+            empty = array('I')
+            lists = sorted((self._postings.get(gram, empty)
+                            for gram in query), key=len)
+            for share in sorted({max(threshold, STRONG_THRESHOLD),
+                                 threshold}, reverse=True):
+                need = max(math.ceil(share * len(query)), 1)
+                scored = self._match(lists, need, limit * RERANK_FACTOR)
+                if scored:
+                    break
+            best = [(shared, pk, self._names[pk]) for shared, pk in scored]
+        text = ' '.join(normalize(text).split())
+        best.sort(key=lambda item: (
+            -similarity(text, item[2]), -item[0], item[1]))
+        return [pk for _, pk, _ in best[:limit]]
+
+    @staticmethod
+    def _match(lists, need, top):
+        """
+        До ``top`` пар (число общих триграмм, pk) с наибольшим числом
+        совпадений, не меньшим ``need``, по спискам в порядке длины.
+        """
+        # Название с need общими триграммами обязательно есть хотя бы в
+        # одном из len(lists) - need + 1 самых коротких списков: кандидаты
+        # берутся только из них. По остальным спискам кандидаты
+        # досчитываются, а те, кому уже не набрать need, отбрасываются.
+        probe = len(lists) - need + 1
+        counts = Counter()
+        for posting in lists[:probe]:
+            counts.update(posting)
+        left = len(lists) - probe
+        for posting in lists[probe:]:
+            counts = {pk: shared for pk, shared in counts.items()
+                      if shared + left >= need}
+            left -= 1
+            if len(posting) > len(counts) * BISECT_RATIO:
+                # В длинном списке кандидаты ищутся бинарным поиском.
+                hits = [pk for pk in counts
+                        if posting[bisect_left(posting, pk)
+                                   % len(posting)] == pk]
+            else:
+                hits = counts.keys() & posting
+            for pk in hits:
+                counts[pk] += 1
+        scored = [(shared, -pk) for pk, shared in counts.items()
+                  if shared >= need]
+        return [(shared, -pk) for shared, pk in heapq.nlargest(top, scored)]
+
+    def set_title(self, pk, name):
+        self.apply(self._set_title, pk, name)
+
+    def _set_title(self, pk, name):
+        old = self._names.get(pk)
+        old_grams = trigrams(old) if old is not None else set()
+        new_grams = trigrams(name)
+        for gram in old_grams - new_grams:
+            self._postings[gram].remove(pk)
+        for gram in new_grams - old_grams:
+            insort(self._postings.setdefault(gram, array('I')), pk)
+        self._names[pk] = name
+
+    def remove_title(self, pk):
+        self.apply(self._remove_title, pk)
+
+    def _remove_title(self, pk):
+        name = self._names.pop(pk, None)
+        if name is None:
+            return
+        for gram in trigrams(name):
+            self._postings[gram].remove(pk)
+
+
+fuzzy_titles = FuzzyTitleIndex()
@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from api.models import Review, Titles
+
+
+def actual_rating():
+    """Сумма оценок и число отзывов произведения по таблице отзывов."""
+    reviews = (Review.objects.filter(title=OuterRef('pk')).order_by()
+               .values('title'))
+    return (
+        Coalesce(Subquery(reviews.annotate(value=Sum('score'))
+                          .values('value')), 0,
+                 output_field=IntegerField()),
+        Coalesce(Subquery(reviews.annotate(value=Count('id'))
+                          .values('value')), 0,
+                 output_field=IntegerField()),
+    )
+
+
+def stale_titles():
+    score_sum, review_count = actual_rating()
+    return (Titles.objects
+            .annotate(actual_sum=score_sum, actual_count=review_count)
+            .exclude(score_sum=F('actual_sum'),
+                     review_count=F('actual_count')))
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает сохранённые сумму оценок и число отзывов '
+            'произведений по таблице отзывов')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Только проверить агрегаты, ничего не изменяя'
+        )
+
+    def handle(self, *args, **options):
+        if options['check']:
+            stale = list(stale_titles().values_list(
+                'pk', 'actual_sum', 'actual_count'))
+            for pk, score_sum, review_count in stale:
+                self.stderr.write(f'title {pk}: expected '
+                                  f'score_sum={score_sum}, '
+                                  f'review_count={review_count}')
+            if stale:
+                raise CommandError(f'{len(stale)} titles have stale ratings')
+            self.stdout.write(self.style.SUCCESS('All ratings are up to date'))
+            return
+
+        # Один UPDATE с подзапросами: агрегаты читаются и записываются
+        # под одной блокировкой, отзыв, добавленный в это время, не
+        # затирается. Рейтинг и число отзывов входят в ETag произведения
+        # и списка его отзывов.
+        score_sum, review_count = actual_rating()
+        rebuilt = Titles.objects.filter(
+            pk__in=stale_titles().values('pk')).update(
+            score_sum=score_sum, review_count=review_count,
+            version=F('version') + 1,
+            reviews_version=F('reviews_version') + 1)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rebuilt} titles'))
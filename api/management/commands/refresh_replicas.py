@@ -0,0 +1,47 @@
+import sqlite3
+import time
+from contextlib import closing
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Сколько секунд ждать, пока читатели реплики отпустят блокировку.
+LOCK_TIMEOUT = 20
+
+
+def copy_database(source, target):
+    """
+    Согласованная копия работающей базы через backup API SQLite. Копия
+    пишется в сам файл реплики через соединение с ним: SQLite меняет
+    страницы под блокировкой, открытые соединения читателей видят либо
+    старую базу, либо новую целиком. Подмена файла через os.replace
+    оставляла бы читателям старый inode и его -wal/-shm.
+    """
+    with closing(sqlite3.connect(source)) as src, \
+            closing(sqlite3.connect(target, timeout=LOCK_TIMEOUT)) as dst:
+        src.backup(dst)
+
+
+class Command(BaseCommand):
+    help = 'Обновляет SQLite-реплики из DATABASE_REPLICAS копией основной базы'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=None,
+            help='Повторять обновление с этим интервалом в секундах'
+        )
+
+    def handle(self, *args, **options):
+        databases = settings.DATABASES
+        if databases['default']['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('Only SQLite replicas are supported')
+        while True:
+            for alias in settings.DATABASE_REPLICAS:
+                start = time.perf_counter()
+                copy_database(databases['default']['NAME'],
+                              databases[alias]['NAME'])
+                elapsed = time.perf_counter() - start
+                self.stdout.write(f'{alias}: refreshed in {elapsed:.2f} s')
+            if options['interval'] is None:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.outbox import send_pending_emails
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди EmailOutbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Количество писем, отправляемых через одно соединение'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Отправить всё, что есть в очереди, и завершиться'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                sent = send_pending_emails(options['batch_size'])
+            except Exception as error:
+                self.stderr.write(f'Sending failed: {error}')
+                sent = 0
+                if options['once']:
+                    raise
+            if sent:
+                self.stdout.write(f'Sent {sent} emails')
+                continue
+            if options['once']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,165 @@
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+def normalize(text):
+    return text.lower().replace('ё', 'е')
+
+
+class MemoryIndex:
+    """
+    Индекс в памяти процесса, построенный по базе. Подклассы реализуют
+    ``load()``, возвращающий новое состояние, и ``install(state)``, который
+    вызывается под ``_lock``. Изменения через API подклассы вносят через
+    ``apply()``, изменения из других процессов подхватываются полной
+    перестройкой не чаще, чем раз в столько секунд, сколько указано
+    в настройке ``rebuild_setting``. Перестройка идёт в фоновом потоке,
+    запросы тем временем отвечают по старому состоянию; ждёт только
+    первое построение, которое ``warm_up()`` начинает при запуске процесса.
+    """
+    rebuild_setting = None
+    instances = []
+
+    def __init__(self):
+        self._reset_locks()
+        self._built_at = None
+        self._loaded = False
+        self.instances.append(self)
+        if hasattr(os, 'register_at_fork'):
+            # Поток перестройки в дочерний процесс не переходит,
+            # а его блокировки перешли бы захваченными.
+            os.register_at_fork(after_in_child=self._reset_locks)
+
+    def _reset_locks(self):
+        self._lock = threading.Lock()
+        # Перестраивает индекс один поток.
+        self._build_lock = threading.Lock()
+        self._builder = None
+        # Изменения, внесённые во время чтения базы, для повтора.
+        self._pending = None
+
+    def __deepcopy__(self, memo):
+        return self
+
+    @classmethod
+    def warm_up(cls):
+        """Начинает в фоне первое построение всех индексов процесса."""
+        if not getattr(settings, 'MEMORY_INDEXES_WARM_UP', False):
+            return
+        for index in cls.instances:
+            if not index._loaded:
+                index.start_rebuild()
+
+    def load(self):
+        raise NotImplementedError
+
+    def install(self, state):
+        raise NotImplementedError
+
+    def after_rebuild(self):
+        """
+        Дочитывает из базы то, что повтор изменений не восстановил
+        в памяти. Вызывается после install() вне ``_lock``.
+        """
+
+    def expire(self):
+        with self._lock:
+            self._built_at = None
+
+    def reset(self):
+        """Забывает индекс: следующий запрос ждёт построения, как первый."""
+        self.join()
+        with self._lock:
+            self._built_at = None
+            self._loaded = False
+
+    def read(self, query):
+        """
+        Выполняет ``query()`` вне ``_lock``. Изменения, внесённые за это
+        время, копятся и повторяются в ``replay()`` под ``_lock``.
+        """
+        with self._lock:
+            self._pending = []
+        try:
+            return query()
+        except BaseException:
+            with self._lock:
+                self._pending = None
+            raise
+
+    def replay(self):
+        for update, args in self._pending:
+            update(*args)
+        self._pending = None
+
+    def rebuild(self):
+        state = self.read(self.load)
+        with self._lock:
+            self.install(state)
+            self.replay()
+            self._built_at = time.monotonic()
+            self._loaded = True
+        self.after_rebuild()
+
+    def is_fresh(self):
+        built_at = self._built_at
+        return built_at is not None and (
+            time.monotonic() - built_at
+            < getattr(settings, self.rebuild_setting))
+
+    def ensure_built(self):
+        if self.is_fresh():
+            return
+        if self._loaded:
+            self.start_rebuild()
+            return
+        # Без первого построения отвечать нечем: запрос ждёт его, в том
+        # числе начатое warm_up(), а если оно не удалось - строит сам.
+        with self._build_lock:
+            if not self._loaded:
+                self.rebuild()
+
+    def start_rebuild(self):
+        """Начинает перестройку в фоновом потоке, если она ещё не идёт."""
+        if not self._build_lock.acquire(blocking=False):
+            return
+        self._builder = threading.Thread(
+            target=self._rebuild_in_background, daemon=True,
+            name=f'{type(self).__name__}.rebuild')
+        self._builder.start()
+
+    def _rebuild_in_background(self):
+        try:
+            self.rebuild()
+        except Exception:
+            logger.exception('Failed to rebuild %s', type(self).__name__)
+        finally:
+            connections.close_all()
+            self._build_lock.release()
+
+    def join(self, timeout=None):
+        """Ждёт окончания фоновой перестройки, если она идёт."""
+        builder = self._builder
+        if builder is not None:
+            builder.join(timeout)
+
+    def apply(self, update, *args, replay=None):
+        """
+        Вносит изменение ``update(*args)`` под ``_lock``. Если в это время
+        читается база, read() мог увидеть её и до, и после изменения,
+        поэтому затем вызывается ``replay(*args)`` (по умолчанию - тот же
+        ``update``): он должен давать верный результат в обоих случаях
+        и не обращаться к базе.
+        """
+        with self._lock:
+            if self._loaded:
+                update(*args)
+            if self._pending is not None:
+                self._pending.append((replay or update, args))
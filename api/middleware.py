@@ -0,0 +1,41 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import permissions
+
+from .routers import use_replica
+
+
+def sticky_key(request):
+    authorization = request.META.get('HTTP_AUTHORIZATION')
+    if not authorization:
+        return None
+    digest = hashlib.sha256(authorization.encode()).hexdigest()
+    return f'replica_sticky:{digest}'
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Направляет чтения безопасных запросов на реплики. После успешного
+    изменяющего запроса клиент с тем же заголовком Authorization
+    REPLICA_STICKY_SECONDS читает с основной базы и видит свои изменения.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        key = sticky_key(request)
+        safe = request.method in permissions.SAFE_METHODS
+        replica = safe and not (key and cache.get(key))
+        token = use_replica.set(replica)
+        try:
+            response = self.get_response(request)
+        finally:
+            use_replica.reset(token)
+        if not safe and key and response.status_code < 400:
+            cache.set(key, True, settings.REPLICA_STICKY_SECONDS)
+        return response
@@ -0,0 +1,36 @@
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def fill_rating_aggregates(apps, schema_editor):
+    Titles = apps.get_model('api', 'Titles')
+    Review = apps.get_model('api', 'Review')
+    aggregates = (Review.objects.values('title')
+                  .annotate(score_sum=Sum('score'), review_count=Count('id')))
+    for row in aggregates:
+        Titles.objects.filter(pk=row['title']).update(
+            score_sum=row['score_sum'],
+            review_count=row['review_count']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_auto_20210626_2327'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='titles',
+            name='score_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Сумма оценок'),
+        ),
+        migrations.AddField(
+            model_name='titles',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество отзывов'),
+        ),
+        migrations.RunPython(fill_rating_aggregates,
+                             migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations, models
+
+USERNAME_NOCASE_INDEX = 'customuser_username_nocase_idx'
+
+
+def create_username_nocase_index(apps, schema_editor):
+    # LIKE в SQLite не чувствителен к регистру и может использовать только
+    # индекс с правилом сравнения NOCASE.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS "{USERNAME_NOCASE_INDEX}" '
+        f'ON "api_customuser" ("username" COLLATE NOCASE)'
+    )
+
+
+def drop_username_nocase_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS "{USERNAME_NOCASE_INDEX}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='titles',
+            index=models.Index(fields=['year', 'id'], name='titles_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titles',
+            index=models.Index(fields=['category', 'id'], name='titles_category_idx'),
+        ),
+        migrations.RunPython(create_username_nocase_index,
+                             drop_username_nocase_index),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='titles',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Версия'),
+        ),
+        migrations.AddField(
+            model_name='titles',
+            name='reviews_version',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Версия отзывов'),
+        ),
+    ]
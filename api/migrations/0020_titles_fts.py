@@ -0,0 +1,84 @@
+from django.db import migrations
+
+FTS_TABLE = 'titles_fts'
+SOURCE_TABLE = 'api_titles'
+COLUMNS = ('name', 'description')
+
+
+def fold(column):
+    # unicode61 не приравнивает «ё» к «е», это делается при индексации
+    # и в запросе (api.search.fts_expression).
+    return f"replace(replace({column}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def values(prefix, columns=COLUMNS):
+    return ', '.join(fold(f'{prefix}{column}') for column in columns)
+
+
+def create_sql(fts_table=FTS_TABLE, source_table=SOURCE_TABLE,
+               columns=COLUMNS, rank='bm25(10.0, 1.0)'):
+    """
+    Внешнее содержимое: в индексе только токены, тексты берутся из
+    исходной таблицы. Индексируется приведённый текст, поэтому индекс
+    заполняется INSERT ... SELECT, а не командой 'rebuild'. Триггер на
+    UPDATE срабатывает лишь при изменении индексируемых колонок, пересчёт
+    рейтинга индекс не трогает. Параметры - для индексов других таблиц
+    в следующих миграциях.
+    """
+    names = ', '.join(columns)
+    insert = (f'INSERT INTO {fts_table}(rowid, {names}) '
+              f'VALUES (new.id, {values("new.", columns)});')
+    delete = (f'INSERT INTO {fts_table}({fts_table}, rowid, {names}) '
+              f"VALUES ('delete', old.id, {values('old.', columns)});")
+    return (
+        f"CREATE VIRTUAL TABLE {fts_table} USING fts5({names}, "
+        f"content='{source_table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2')",
+        # Для произведений совпадение в названии весит в 10 раз больше,
+        # чем в описании.
+        f"INSERT INTO {fts_table}({fts_table}, rank) "
+        f"VALUES('rank', '{rank}')",
+        f'CREATE TRIGGER {fts_table}_insert AFTER INSERT ON {source_table} '
+        f'BEGIN {insert} END',
+        f'CREATE TRIGGER {fts_table}_delete AFTER DELETE ON {source_table} '
+        f'BEGIN {delete} END',
+        f'CREATE TRIGGER {fts_table}_update '
+        f'AFTER UPDATE OF {names} ON {source_table} '
+        f'BEGIN {delete} {insert} END',
+        f'INSERT INTO {fts_table}(rowid, {names}) '
+        f'SELECT id, {values("", columns)} FROM {source_table}',
+    )
+
+
+def drop_sql(fts_table=FTS_TABLE):
+    return (
+        f'DROP TRIGGER IF EXISTS {fts_table}_insert',
+        f'DROP TRIGGER IF EXISTS {fts_table}_delete',
+        f'DROP TRIGGER IF EXISTS {fts_table}_update',
+        f'DROP TABLE IF EXISTS {fts_table}',
+    )
+
+
+def create_titles_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in create_sql():
+        schema_editor.execute(sql)
+
+
+def drop_titles_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in drop_sql():
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_titles_versions'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_titles_fts, drop_titles_fts),
+    ]
@@ -0,0 +1,42 @@
+from importlib import import_module
+
+from django.db import migrations
+
+titles_fts = import_module('api.migrations.0020_titles_fts')
+
+# Кроме текста индексируются ключи, по которым фильтрует поиск: фильтр
+# становится частью запроса FTS5 (title_id : 12), и пересечение
+# со словами выполняется внутри индекса. Ключи в ранжировании
+# не участвуют.
+INDEXES = (
+    ('reviews_fts', 'api_review', ('text', 'title_id', 'author_id')),
+    ('comments_fts', 'api_comment', ('text', 'review_id', 'author_id')),
+)
+
+
+def create_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for fts_table, source_table, columns in INDEXES:
+        for sql in titles_fts.create_sql(fts_table, source_table, columns,
+                                         rank='bm25(1.0, 0.0, 0.0)'):
+            schema_editor.execute(sql)
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for fts_table, _, _ in INDEXES:
+        for sql in titles_fts.drop_sql(fts_table):
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_titles_fts'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
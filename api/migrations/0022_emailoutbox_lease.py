@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0021_reviews_comments_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailoutbox',
+            name='lease',
+            field=models.UUIDField(blank=True, null=True, verbose_name='Пачка отправки'),
+        ),
+        migrations.AddField(
+            model_name='emailoutbox',
+            name='locked_until',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Занято до'),
+        ),
+    ]
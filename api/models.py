@@ -1,16 +1,22 @@
 from datetime import datetime, timedelta
 
 import jwt.api_jwt
-from api_yamdb import settings
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
+from django.core.cache import cache
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import connection, models
+from django.db.models import F
 
 from .validators import validate_year
 
 SCORE_MESSAGE = 'Оценка должна быть в диапазоне от 1 до 10'
 
 
+def token_version_key(user_id):
+    return f'token_version:{user_id}'
+
+
 class Roles(models.TextChoices):
     ADMIN = 'admin'
     MODERATOR = 'moderator'
@@ -31,6 +37,54 @@ class CustomUser(AbstractUser):
         default=Roles.USER,
         verbose_name='Уровень прав пользователя'
     )
+    token_version = models.PositiveIntegerField(
+        default=0, editable=False,
+        verbose_name='Версия токенов'
+    )
+
+    # Поля, которые попадают в токен; их изменение отзывает старые токены.
+    TOKEN_CLAIMS = ('role', 'is_staff', 'is_superuser', 'is_active')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_claims = instance._token_claims()
+        instance._loaded_username = instance.username
+        return instance
+
+    def _token_claims(self):
+        return tuple(self.__dict__.get(name) for name in self.TOKEN_CLAIMS)
+
+    def save(self, *args, **kwargs):
+        loaded = getattr(self, '_loaded_claims', None)
+        if loaded is not None and loaded != self._token_claims():
+            self.token_version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'token_version'}
+        renamed = getattr(self, '_loaded_username', None) not in (
+            None, self.username)
+        super().save(*args, **kwargs)
+        self._loaded_claims = self._token_claims()
+        self._loaded_username = self.username
+        if renamed:
+            # Имя автора выводится в отзывах.
+            Titles.objects.filter(reviews__author=self).update(
+                reviews_version=F('reviews_version') + 1)
+        if settings.TOKEN_VERSION_CACHE_SECONDS:
+            cache.set(token_version_key(self.pk), self.token_version,
+                      settings.TOKEN_VERSION_CACHE_SECONDS)
+
+    @classmethod
+    def revoke_tokens(cls, pks):
+        """Отзывает токены пользователей, изменённых в обход save()."""
+        cls.objects.filter(pk__in=pks).update(
+            token_version=F('token_version') + 1)
+        cache.delete_many([token_version_key(pk) for pk in pks])
+
+    def delete(self, *args, **kwargs):
+        cache.delete(token_version_key(self.pk))
+        return super().delete(*args, **kwargs)
 
     def _gen_confirm_code(self):
         dt = datetime.now() + timedelta(days=1)
@@ -76,6 +130,67 @@ class Titles(models.Model):
         null=True, blank=True,
         verbose_name='Описание'
     )
+    score_sum = models.PositiveIntegerField(
+        default=0, editable=False,
+        verbose_name='Сумма оценок'
+    )
+    review_count = models.PositiveIntegerField(
+        default=0, editable=False,
+        verbose_name='Количество отзывов'
+    )
+    # Счётчики изменений для ETag: version - самого произведения вместе
+    # с рейтингом, reviews_version - его отзывов.
+    version = models.PositiveIntegerField(
+        default=0, editable=False,
+        verbose_name='Версия'
+    )
+    reviews_version = models.PositiveIntegerField(
+        default=0, editable=False,
+        verbose_name='Версия отзывов'
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['year', 'id'], name='titles_year_idx'),
+            models.Index(fields=['category', 'id'],
+                         name='titles_category_idx'), ]
+
+    # Счётчики меняются только запросами UPDATE с F(), сохранение
+    # объекта, загруженного раньше, их не перезаписывает.
+    COUNTER_FIELDS = ('score_sum', 'review_count', 'version',
+                      'reviews_version')
+
+    def save(self, force_insert=False, force_update=False, using=None,
+             update_fields=None):
+        if self._state.adding or force_insert or update_fields is not None:
+            return super().save(force_insert, force_update, using,
+                                update_fields)
+        update_fields = [field.name for field in self._meta.concrete_fields
+                         if not field.primary_key
+                         and field.name not in self.COUNTER_FIELDS]
+        super().save(force_insert, force_update, using, update_fields)
+        type(self).bump_version(pk=self.pk)
+        self.refresh_from_db(using=using, fields=self.COUNTER_FIELDS)
+
+    @property
+    def rating(self):
+        if not self.review_count:
+            return None
+        return self.score_sum / self.review_count
+
+    @classmethod
+    def shift_rating(cls, pk, score_delta, count_delta=0):
+        """Вызывается при каждом изменении отзыва."""
+        cls.objects.filter(pk=pk).update(
+            score_sum=F('score_sum') + score_delta,
+            review_count=F('review_count') + count_delta,
+            version=F('version') + 1,
+            reviews_version=F('reviews_version') + 1
+        )
+
+    @classmethod
+    def bump_version(cls, **filters):
+        cls.objects.filter(**filters).update(version=F('version') + 1)
 
 
 class Review(models.Model):
@@ -107,10 +222,32 @@ class Review(models.Model):
     def __str__(self):
         return self.text
 
+    @classmethod
+    def locked(cls, pk):
+        """
+        Отзыв ``pk``, заблокированный до конца транзакции: его не изменит
+        параллельный запрос.
+        """
+        reviews = cls.objects.filter(pk=pk)
+        if connection.features.has_select_for_update:
+            return reviews.select_for_update()
+        # SQLite блокирует базу на запись только при первой записи,
+        # а транзакция, начатая с чтения, её не дождётся.
+        reviews.update(score=F('score'))
+        return reviews
+
+    @classmethod
+    def locked_score(cls, pk):
+        """Оценка отзыва под блокировкой. None - отзыва нет."""
+        return cls.locked(pk).values_list('score', flat=True).first()
+
     class Meta:
         constraints = [
             models.UniqueConstraint(fields=['title', 'author'],
                                     name='unique_reviewing'), ]
+        indexes = [
+            models.Index(fields=['title', 'pub_date', 'id'],
+                         name='review_title_pub_date_idx'), ]
 
 
 class Comment(models.Model):
@@ -131,3 +268,46 @@ class Comment(models.Model):
         verbose_name='Дата добавления',
         auto_now_add=True
     )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['review', 'pub_date', 'id'],
+                         name='comment_review_pub_date_idx'), ]
+
+
+class EmailOutbox(models.Model):
+    subject = models.CharField(max_length=255, verbose_name='Тема')
+    message = models.TextField(verbose_name='Текст письма')
+    from_email = models.EmailField(verbose_name='Отправитель')
+    recipient = models.EmailField(verbose_name='Получатель')
+    created = models.DateTimeField(
+        verbose_name='Дата создания',
+        auto_now_add=True
+    )
+    sent_at = models.DateTimeField(
+        null=True, blank=True,
+        verbose_name='Дата отправки'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток отправки'
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка'
+    )
+    # Письма пачки, взятой в отправку, до locked_until не берутся другими
+    # отправителями; lease отличает свою пачку от чужих.
+    lease = models.UUIDField(
+        null=True, blank=True,
+        verbose_name='Пачка отправки'
+    )
+    locked_until = models.DateTimeField(
+        null=True, blank=True,
+        verbose_name='Занято до'
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['sent_at', 'id'],
+                         name='outbox_pending_idx'), ]
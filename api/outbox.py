@@ -0,0 +1,57 @@
+import uuid
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+# Пачка, взятая в отправку, закреплена за отправителем на это время;
+# если он не отметил письма отправленными, их возьмёт следующий.
+LEASE_TIME = timedelta(minutes=10)
+
+
+def claim_batch(batch_size, max_attempts):
+    """
+    Закрепляет за вызывающим до ``batch_size`` неотправленных писем
+    и возвращает их. Выбор и закрепление - один UPDATE, транзакция
+    на время отправки не нужна.
+    """
+    now = timezone.now()
+    free = Q(locked_until=None) | Q(locked_until__lt=now)
+    pending = (EmailOutbox.objects
+               .filter(free, sent_at=None, attempts__lt=max_attempts)
+               .order_by('id').values('pk')[:batch_size])
+    lease = uuid.uuid4()
+    EmailOutbox.objects.filter(free, pk__in=pending).update(
+        lease=lease, locked_until=now + LEASE_TIME,
+        attempts=F('attempts') + 1)
+    return lease, list(EmailOutbox.objects.filter(lease=lease).order_by('id'))
+
+
+def send_pending_emails(batch_size=100, max_attempts=5):
+    """
+    Отправляет одну пачку неотправленных писем через одно соединение
+    с почтовым бэкендом. Возвращает количество отправленных писем.
+    Во время отправки база не заблокирована: письма закрепляются,
+    отправляются и отмечаются отправленными короткими отдельными
+    запросами.
+    """
+    lease, batch = claim_batch(batch_size, max_attempts)
+    if not batch:
+        return 0
+    messages = [
+        EmailMessage(subject=email.subject, body=email.message,
+                     from_email=email.from_email, to=[email.recipient])
+        for email in batch
+    ]
+    claimed = EmailOutbox.objects.filter(lease=lease)
+    try:
+        with get_connection() as mail_connection:
+            mail_connection.send_messages(messages)
+    except Exception as exc:
+        claimed.update(lease=None, locked_until=None, last_error=str(exc))
+        raise
+    claimed.update(sent_at=timezone.now(), lease=None, locked_until=None)
+    return len(batch)
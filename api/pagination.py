@@ -0,0 +1,130 @@
+from collections import OrderedDict
+from functools import partial
+
+from django.core.paginator import Paginator
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(pagination.CursorPagination):
+    """
+    Курсорная пагинация с тем же форматом ответа, что и у постраничной.
+    Пустой параметр ``cursor`` означает первую страницу.
+    """
+
+    def decode_cursor(self, request):
+        if not request.query_params.get(self.cursor_query_param):
+            return None
+        return super().decode_cursor(request)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', None),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+
+class CountedPaginator(Paginator):
+    """Paginator с заранее известным количеством объектов."""
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.__dict__['count'] = count
+
+
+class OptionalCursorPagination(pagination.PageNumberPagination):
+    """
+    Постраничная пагинация, которая переходит на курсорную, если в запросе
+    есть параметр ``cursor``. Курсор строится по ключам ``cursor_ordering``.
+    Если у view есть ``paginator_count``, запрос COUNT не выполняется.
+    С параметрами из ``ranked_query_params`` курсор не принимается:
+    курсор упорядочил бы результаты по своим ключам, а не по релевантности.
+    """
+    cursor_query_param = 'cursor'
+    cursor_ordering = ('id', )
+    ranked_query_params = ()
+
+    keyset = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param not in request.query_params:
+            count = getattr(view, 'paginator_count', None)
+            if count is not None:
+                self.django_paginator_class = partial(CountedPaginator,
+                                                      count=count)
+            return super().paginate_queryset(queryset, request, view)
+        ranked = [param for param in self.ranked_query_params
+                  if request.query_params.get(param)]
+        if ranked:
+            raise ValidationError({self.cursor_query_param: (
+                f'Cursor pagination is not available with `{ranked[0]}`, '
+                f'use `page` instead.')})
+        self.keyset = KeysetPagination()
+        self.keyset.cursor_query_param = self.cursor_query_param
+        self.keyset.ordering = self.cursor_ordering
+        return self.keyset.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class TitleCursorPagination(OptionalCursorPagination):
+    ranked_query_params = ('search', 'fuzzy')
+
+
+class PubDateCursorPagination(OptionalCursorPagination):
+    cursor_ordering = ('-pub_date', '-id')
+
+
+class UncountedPagination(pagination.PageNumberPagination):
+    """
+    Постраничная пагинация без запроса COUNT: о следующей странице
+    говорит лишняя запись в выборке. Ответ в том же формате, ``count``
+    всегда None.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        try:
+            self.number = int(
+                request.query_params.get(self.page_query_param, 1))
+        except ValueError:
+            self.number = 0
+        if self.number < 1:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=request.query_params[self.page_query_param],
+                message='Invalid page.'))
+        offset = (self.number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        self.has_next = len(rows) > page_size
+        return rows[:page_size]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(),
+                                   self.page_query_param, self.number + 1)
+
+    def get_previous_link(self):
+        if self.number == 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param,
+                                   self.number - 1)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', None),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
@@ -11,7 +11,7 @@ class IsOwnerOrAdminOrModeratorOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         return (
             request.method in permissions.SAFE_METHODS
-            or obj.author == request.user
+            or obj.author_id == request.user.pk
             or request.user.is_admin
             or request.user.role == Roles.MODERATOR
         )
@@ -0,0 +1,58 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+
+class ListCache:
+    """
+    Кэш отрендеренных ответов анонимным пользователям по полному пути
+    запроса вместе с параметрами. Ключи содержат версию, так что
+    ``invalidate()`` разом делает устаревшими все ответы, в том числе в
+    других процессах при общем бэкенде кэша.
+    """
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.version_key = f'list_cache_version:{prefix}'
+
+    def version(self):
+        # Начальная версия от времени не совпадёт с версиями,
+        # вытесненными из кэша ранее.
+        return cache.get_or_set(self.version_key,
+                                time.time_ns(), timeout=None)
+
+    def key(self, request):
+        path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        return f'list_response:{self.prefix}:{self.version()}:{path}'
+
+    def cacheable(self, request):
+        return (request.method in ('GET', 'HEAD')
+                and not request.user.is_authenticated
+                and request.accepted_renderer.format == 'json')
+
+    def get(self, key):
+        cached = cache.get(key)
+        if cached is None:
+            return None
+        content, headers = cached
+        return HttpResponse(content, headers=headers)
+
+    def set(self, key, response):
+        # Вместе с телом сохраняются все заголовки ответа (Content-Type,
+        # ETag, Link и другие), иначе ответ из кэша отличался бы
+        # от исходного.
+        cache.set(key, (response.content, dict(response.items())),
+                  settings.LIST_CACHE_TIMEOUT)
+
+    def invalidate(self):
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            cache.set(self.version_key, time.time_ns(), timeout=None)
+
+
+category_lists = ListCache('categories')
+genre_lists = ListCache('genres')
@@ -0,0 +1,33 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Выставляется ReplicaRoutingMiddleware для безопасных запросов.
+use_replica = ContextVar('use_replica', default=False)
+
+
+class ReplicaRouter:
+    """
+    Чтения внутри запросов, отмеченных use_replica, уходят на одну из
+    баз DATABASE_REPLICAS, всё остальное - в default. Пользователи всегда
+    читаются из default: по ним проверяются роль и отзыв токенов, а
+    реплика отстаёт до следующего refresh_replicas.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.label == settings.AUTH_USER_MODEL:
+            return 'default'
+        replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+        if replicas and use_replica.get():
+            return random.choice(replicas)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in getattr(settings, 'DATABASE_REPLICAS', [])
@@ -0,0 +1,125 @@
+"""
+Полнотекстовый поиск на SQLite FTS5. Индексы создаются миграциями
+и поддерживаются триггерами, поэтому синхронны при любой записи, включая
+bulk_create и load_csv. На других СУБД поиск сводится к icontains.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+TITLES_FTS = 'titles_fts'
+REVIEWS_FTS = 'reviews_fts'
+COMMENTS_FTS = 'comments_fts'
+WORD_RE = re.compile(r'\w+')
+# Найденные слова во фрагментах выделяются так же, как в Markdown.
+SNIPPET_MARK = '**'
+SNIPPET_ELLIPSIS = '…'
+SNIPPET_TOKENS = 16
+
+
+def fts_available():
+    return connection.vendor == 'sqlite'
+
+
+def fts_expression(text, columns=None, keys=None, prefix=True):
+    """
+    Запрос FTS5 из произвольного текста: все слова должны встретиться,
+    с ``prefix`` - каждое как префикс. Спецсимволы синтаксиса FTS5
+    отбрасываются.
+    ``keys`` - точные значения проиндексированных ключей, например
+    {'title_id': 12}. None - в тексте нет слов.
+    """
+    words = WORD_RE.findall(text.replace('ё', 'е').replace('Ё', 'Е'))
+    if not words:
+        return None
+    star = '*' if prefix else ''
+    expression = ' '.join(f'"{word}"{star}' for word in words)
+    if columns:
+        expression = f'{{{" ".join(columns)}}} : ({expression})'
+    for column, value in (keys or {}).items():
+        expression += f' AND {column} : "{int(value)}"'
+    return expression
+
+
+def fallback_filter(text, columns):
+    condition = Q()
+    for word in WORD_RE.findall(text):
+        word_condition = Q()
+        for column in columns:
+            word_condition |= Q(**{f'{column}__icontains': word})
+        condition &= word_condition
+    return condition
+
+
+def filter_matching(queryset, table, text, columns):
+    """
+    Оставляет записи, подходящие под ``text`` в колонках ``columns``
+    индекса ``table``, без ранжирования.
+    """
+    if not fts_available():
+        return queryset.filter(fallback_filter(text, columns))
+    expression = fts_expression(text, columns)
+    if expression is None:
+        return queryset.none()
+    return queryset.filter(id__in=RawSQL(
+        f'SELECT rowid FROM {table} WHERE {table} MATCH %s', [expression]))
+
+
+def rank_matching(queryset, table, text, columns, snippet=False,
+                  keys=None, window=None, prefix=True):
+    """
+    Оставляет подходящие под ``text`` записи и упорядочивает их
+    по релевантности (bm25). С ``snippet`` у записей есть атрибут
+    ``search_snippet`` - фрагмент первой колонки с выделенными словами.
+    ``keys`` - фильтры по ключам, проиндексированным вместе с текстом.
+    ``window`` ограничивает ранжирование столькими последними
+    совпадениями. Поиск по префиксу объединяет в памяти списки всех слов
+    с этим началом, без ``prefix`` ищутся слова целиком. Без FTS5 записи
+    не ранжируются, фрагмента нет, а ``keys`` нужно применить к queryset
+    отдельно.
+    """
+    if not fts_available():
+        return queryset.filter(fallback_filter(text, columns))
+    expression = fts_expression(text, columns, keys, prefix)
+    if expression is None:
+        return queryset.none()
+    where = [f'{table}.rowid = {queryset.model._meta.db_table}.id',
+             f'{table} MATCH %s']
+    params = [expression]
+    if window:
+        # Частое слово встречается в миллионах записей, и bm25 пришлось
+        # бы считать для каждой. Граница окна находится обходом индекса
+        # с конца, а условие на rowid FTS5 выполняет поиском в индексе.
+        where.append(f'{table}.rowid >= coalesce((SELECT rowid FROM {table} '
+                     f'WHERE {table} MATCH %s ORDER BY rowid DESC '
+                     f'LIMIT 1 OFFSET %s), 0)')
+        params += [expression, window - 1]
+    select = {'search_rank': f'{table}.rank'}
+    if snippet:
+        select['search_snippet'] = (
+            f"snippet({table}, 0, '{SNIPPET_MARK}', '{SNIPPET_MARK}', "
+            f"'{SNIPPET_ELLIPSIS}', {SNIPPET_TOKENS})")
+    # Соединение с виртуальной таблицей: SQLite начинает с поиска
+    # по индексу и достаёт записи по rowid.
+    return queryset.extra(
+        tables=[table],
+        where=where,
+        params=params,
+        select=select,
+        order_by=['search_rank', 'id'],
+    )
+
+
+def filter_titles(queryset, text, columns=('name', 'description')):
+    """Оставляет произведения, подходящие под ``text``, без ранжирования."""
+    return filter_matching(queryset, TITLES_FTS, text, columns)
+
+
+def rank_titles(queryset, text):
+    """
+    Оставляет подходящие под ``text`` произведения и упорядочивает их
+    по релевантности (совпадение в названии весит больше).
+    """
+    return rank_matching(queryset, TITLES_FTS, text, ('name', 'description'))
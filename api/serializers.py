@@ -1,16 +1,51 @@
 from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
-from rest_framework import serializers
+from django.utils.functional import cached_property
+from django.utils.text import Truncator
+from rest_framework import permissions, relations, serializers
 from rest_framework.exceptions import ParseError, ValidationError
 from rest_framework.fields import EmailField
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.views import TokenObtainPairView
 
+from .authentication import add_token_claims
 from .models import Categories, Comment, Genres, Review, Titles
+from .search import SNIPPET_TOKENS
+from .slug_cache import category_slugs, genre_slugs
 
 User = get_user_model()
 
 
+def requested_fields(request, allowed):
+    """
+    Поля из параметра ``?fields=`` безопасного запроса или None, если
+    параметра нет. Неизвестные поля - ошибка 400.
+    """
+    if request is None or request.method not in permissions.SAFE_METHODS:
+        return None
+    value = request.query_params.get('fields')
+    if not value:
+        return None
+    fields = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = fields - set(allowed)
+    if unknown:
+        raise ValidationError(
+            {'fields': f'Unknown fields: {", ".join(sorted(unknown))}.'})
+    return fields
+
+
+class SparseFieldsMixin:
+    """Оставляет в ответе только поля из ``?fields=``."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = requested_fields(self.context.get('request'), self.fields)
+        if fields is None:
+            return
+        for name in set(self.fields) - fields:
+            self.fields.pop(name)
+
+
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
 
     def __init__(self, *args, **kwargs):
@@ -18,12 +53,16 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
         self.fields['confirmation_code'] = serializers.CharField(required=True)
         self.fields.pop('password', None)
 
+    @classmethod
+    def get_token(cls, user):
+        return add_token_claims(super().get_token(user), user)
+
     def validate(self, attrs):
         self.user = get_object_or_404(User,
                                       email=attrs[self.username_field])
         if not self.user._gen_confirm_code() == attrs['confirmation_code']:
             raise ParseError(detail='Confirmation code is wrong or expired.')
-        refresh = super().get_token(self.user)
+        refresh = self.get_token(self.user)
         return {'token': str(refresh.access_token)}
 
 
@@ -58,40 +97,99 @@ class GenresSerializer(serializers.ModelSerializer):
         model = Genres
 
 
+class CachedManyRelatedField(serializers.ManyRelatedField):
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        slugs = [self.child_relation.to_slug(item) for item in data]
+        found = self.child_relation.cache.resolve(slugs)
+        for slug in slugs:
+            if slug not in found:
+                self.child_relation.fail('does_not_exist',
+                                         slug_name='slug', value=slug)
+        return [found[slug] for slug in slugs]
+
+
+class CachedSlugRelatedField(serializers.SlugRelatedField):
+    """SlugRelatedField, который ищет объекты через SlugCache."""
+
+    def __init__(self, cache, **kwargs):
+        self.cache = cache
+        super().__init__(slug_field='slug', **kwargs)
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in relations.MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return CachedManyRelatedField(**list_kwargs)
+
+    def to_slug(self, data):
+        if not isinstance(data, str):
+            self.fail('invalid')
+        return data
+
+    def to_internal_value(self, data):
+        slug = self.to_slug(data)
+        found = self.cache.resolve([slug])
+        if slug not in found:
+            self.fail('does_not_exist', slug_name='slug', value=slug)
+        return found[slug]
+
+
+class TitlesReadSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    category = CategoriesSerializer(read_only=True)
+    genre = GenresSerializer(many=True, read_only=True)
+    rating = serializers.FloatField(read_only=True)
+
+    class Meta:
+        exclude = ('score_sum', 'review_count', 'version',
+                   'reviews_version')
+        model = Titles
+
+
 class TitlesSerializer(serializers.ModelSerializer):
-    category = serializers.SlugRelatedField(queryset=Categories.objects.all(),
-                                            slug_field='slug')
-    genre = serializers.SlugRelatedField(many=True,
-                                         queryset=Genres.objects.all(),
-                                         slug_field='slug')
-    rating = serializers.FloatField(required=False)
+    category = CachedSlugRelatedField(cache=category_slugs,
+                                      queryset=Categories.objects.all())
+    genre = CachedSlugRelatedField(cache=genre_slugs, many=True,
+                                   queryset=Genres.objects.all())
+    rating = serializers.FloatField(read_only=True)
 
     class Meta:
-        fields = '__all__'
+        exclude = ('score_sum', 'review_count', 'version',
+                   'reviews_version')
         model = Titles
 
+    @cached_property
+    def read_serializer(self):
+        return TitlesReadSerializer(context=self.context)
+
     def to_representation(self, obj):
-        self.fields['category'] = CategoriesSerializer()
-        self.fields['genre'] = GenresSerializer(many=True)
-        return super().to_representation(obj)
+        return self.read_serializer.to_representation(obj)
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class TitleIdsSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1),
+                                allow_empty=False, max_length=200)
+
+
+class ReviewSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True
     )
-    title = serializers.SlugRelatedField(
-        slug_field='id',
-        read_only=True
-    )
+    title = serializers.PrimaryKeyRelatedField(read_only=True)
 
     def validate(self, data):
         if self.context['request'].method != 'POST':
             return data
         author = self.context['request'].user
         title = self.context['view'].kwargs['title_id']
-        review = Review.objects.filter(author=author, title=title)
+        review = Review.objects.filter(author_id=author.pk, title=title)
         if review.exists():
             raise ValidationError('Вы уже оставили свой отзыв')
         return data
@@ -101,7 +199,7 @@ class ReviewSerializer(serializers.ModelSerializer):
         model = Review
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         read_only=True,
         slug_field='username'
@@ -110,3 +208,40 @@ class CommentSerializer(serializers.ModelSerializer):
     class Meta:
         exclude = ['review', ]
         model = Comment
+
+
+class SnippetField(serializers.ReadOnlyField):
+    """
+    Фрагмент текста с найденными словами. Без FTS5 фрагмента нет,
+    отдаётся начало текста.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(source='*', **kwargs)
+
+    def to_representation(self, obj):
+        snippet = getattr(obj, 'search_snippet', None)
+        if snippet is None:
+            snippet = Truncator(obj.text).words(SNIPPET_TOKENS)
+        return snippet
+
+
+class ReviewSearchSerializer(serializers.ModelSerializer):
+    author = serializers.SlugRelatedField(slug_field='username',
+                                          read_only=True)
+    snippet = SnippetField()
+
+    class Meta:
+        fields = ('id', 'title', 'author', 'score', 'pub_date', 'snippet')
+        model = Review
+
+
+class CommentSearchSerializer(serializers.ModelSerializer):
+    author = serializers.SlugRelatedField(slug_field='username',
+                                          read_only=True)
+    title = serializers.IntegerField(source='title_id', read_only=True)
+    snippet = SnippetField()
+
+    class Meta:
+        fields = ('id', 'review', 'title', 'author', 'pub_date', 'snippet')
+        model = Comment
@@ -0,0 +1,138 @@
+import threading
+
+from django.conf import settings
+from django.db import transaction
+
+from .autocomplete import completions
+from .facets import title_facets
+from .fuzzy import fuzzy_titles
+from .models import Categories, Genres, Review, Titles
+from .slug_cache import category_slugs, genre_slugs
+
+# Кэш slug и виды групп в автодополнении и фасетах.
+GROUPS = {
+    Categories: (category_slugs, 'categories', 'category'),
+    Genres: (genre_slugs, 'genres', 'genre'),
+}
+
+# pk произведений, которые удаляются в этом потоке: их рейтинг вместе
+# с отзывами пересчитывать незачем.
+_deleting = threading.local()
+
+
+def set_sqlite_pragmas(sender, connection, **kwargs):
+    """
+    Применяет SQLITE_PRAGMAS из настроек к каждому новому соединению,
+    кроме соединений с репликами: они только читают копию, а journal_mode
+    записывал бы в её файл.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    if connection.alias in settings.DATABASE_REPLICAS:
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def shift_title_rating(title_id, score_delta, count_delta=0):
+    """Меняет рейтинг произведения в базе и, после коммита, в индексах."""
+    Titles.shift_rating(title_id, score_delta, count_delta)
+    transaction.on_commit(lambda: completions.shift_rating(
+        title_id, score_delta, count_delta))
+
+
+def deleting_titles():
+    if not hasattr(_deleting, 'titles'):
+        _deleting.titles = set()
+    return _deleting.titles
+
+
+def title_pre_delete(sender, instance, **kwargs):
+    deleting_titles().add(instance.pk)
+
+
+def forget_title(pk):
+    """Убирает удалённое произведение из всех индексов в памяти."""
+    completions.remove_title(pk)
+    fuzzy_titles.remove_title(pk)
+    title_facets.remove_title(pk)
+
+
+def title_post_delete(sender, instance, **kwargs):
+    """
+    Произведения удаляются через API, каскадом вместе с категорией и из
+    админки; индексы обновляются после коммита в любом случае.
+    """
+    pk = instance.pk
+    deleting_titles().discard(pk)
+    transaction.on_commit(lambda: forget_title(pk))
+
+
+def review_post_delete(sender, instance, **kwargs):
+    """
+    Любое удаление отзыва меняет рейтинг: и через API, и каскадом вместе
+    с пользователем, и из админки.
+    """
+    if instance.title_id not in deleting_titles():
+        shift_title_rating(instance.title_id, -instance.score, -1)
+
+
+def review_pre_save(sender, instance, raw=False, **kwargs):
+    """Запоминает произведение и оценку отзыва до изменения."""
+    instance._stored_rating = None
+    if raw or instance._state.adding:
+        return
+    instance._stored_rating = (Review.locked(instance.pk)
+                               .values_list('title_id', 'score').first())
+
+
+def review_post_save(sender, instance, created, raw=False, **kwargs):
+    """
+    Создание и изменение отзыва меняют рейтинг так же, как удаление:
+    через API, из админки и через ORM. Изменение без новой оценки тоже
+    сдвигает версию отзывов произведения для ETag.
+    """
+    stored = instance.__dict__.pop('_stored_rating', None)
+    if raw:
+        return
+    if stored is None:
+        shift_title_rating(instance.title_id, instance.score, 1)
+        return
+    title_id, score = stored
+    if title_id != instance.title_id:
+        shift_title_rating(title_id, -score, -1)
+        shift_title_rating(instance.title_id, instance.score, 1)
+    else:
+        shift_title_rating(title_id, instance.score - score)
+
+
+def group_post_save(sender, instance, created, raw=False, **kwargs):
+    """
+    Категория или жанр изменены через API, из админки или через ORM:
+    после коммита кэш slug сбрасывается во всех процессах, иначе
+    удалённый slug прошёл бы проверку сериализатора, а группа попадает
+    в индексы автодополнения и фасетов.
+    """
+    slugs, kind, facet = GROUPS[sender]
+    transaction.on_commit(slugs.invalidate)
+    if raw:
+        return
+    pk, name, slug = instance.pk, instance.name, instance.slug
+    transaction.on_commit(lambda: completions.add_group(kind, pk, name, slug))
+    transaction.on_commit(lambda: title_facets.add_group(facet, pk, name,
+                                                         slug))
+
+
+def group_post_delete(sender, instance, **kwargs):
+    """
+    Произведения удалённой категории убирает из индексов сигнал
+    post_delete произведений, а группа убирается здесь, без перестройки
+    индексов.
+    """
+    slugs, kind, facet = GROUPS[sender]
+    pk = instance.pk
+    transaction.on_commit(slugs.invalidate)
+    transaction.on_commit(lambda: completions.remove_group(kind, pk))
+    transaction.on_commit(lambda: title_facets.remove_group(facet, pk))
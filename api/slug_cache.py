@@ -0,0 +1,76 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.db import router
+
+from .models import Categories, Genres
+
+
+class SlugCache:
+    """
+    LRU-кэш ``slug -> объект`` для моделей с полями ``name`` и ``slug``.
+    Промахи по нескольким slug загружаются одним запросом ``slug__in``.
+    Кэш свой у каждого процесса, а версия - общая в ``django.core.cache``:
+    ``invalidate()`` в любом процессе сбрасывает кэши всех процессов
+    при их следующем обращении.
+    """
+
+    def __init__(self, model, maxsize=1024):
+        self.model = model
+        self.maxsize = maxsize
+        self.version_key = f'slug_cache_version:{model._meta.label_lower}'
+        self._version = None
+        self._rows = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo):
+        # Поля сериализатора копируются для каждого экземпляра,
+        # а кэш должен оставаться общим.
+        return self
+
+    def version(self):
+        return cache.get_or_set(self.version_key,
+                                time.time_ns(), timeout=None)
+
+    def resolve(self, slugs):
+        """Возвращает словарь ``slug -> объект`` для найденных slug."""
+        version = self.version()
+        found = {}
+        with self._lock:
+            if version != self._version:
+                self._rows.clear()
+                self._version = version
+            for slug in slugs:
+                row = self._rows.get(slug)
+                if row is not None:
+                    self._rows.move_to_end(slug)
+                    found[slug] = row
+        missing = set(slugs) - set(found)
+        if missing:
+            rows = self.model.objects.filter(slug__in=missing).values_list(
+                'id', 'name', 'slug')
+            with self._lock:
+                for row in rows:
+                    found[row[2]] = row
+                    # Строки, прочитанные до смены версии, не кэшируются.
+                    if self._version == version:
+                        self._rows[row[2]] = row
+                while len(self._rows) > self.maxsize:
+                    self._rows.popitem(last=False)
+        db = router.db_for_read(self.model)
+        return {slug: self.model.from_db(db, ['id', 'name', 'slug'], row)
+                for slug, row in found.items()}
+
+    def invalidate(self):
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            cache.set(self.version_key, time.time_ns(), timeout=None)
+        with self._lock:
+            self._rows.clear()
+
+
+category_slugs = SlugCache(Categories)
+genre_slugs = SlugCache(Genres)
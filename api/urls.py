@@ -14,6 +14,10 @@ router_v1.register(
     r'titles/(?P<title_id>[^/.]+)/reviews/(?P<review_id>[^/.]+)/comments',
     views.CommentViewSet, basename='comment')
 router_v1.register('users', views.UserView, basename='users')
+router_v1.register('search/reviews', views.ReviewSearchViewSet,
+                   basename='search-reviews')
+router_v1.register('search/comments', views.CommentSearchViewSet,
+                   basename='search-comments')
 url_auth = [
     path('token/', MyTokenObtainPairView.as_view(),
          name='token_obtain_pair'),
@@ -22,5 +26,6 @@ url_auth = [
 
 urlpatterns = [
     path('v1/auth/', include(url_auth)),
+    path('v1/autocomplete/', views.AutocompleteView.as_view()),
     path('v1/', include(router_v1.urls)),
 ]
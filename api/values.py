@@ -0,0 +1,84 @@
+"""
+Сериализация списков из строк ``.values()`` без создания экземпляров
+моделей. Результат совпадает с выводом соответствующих ModelSerializer.
+"""
+from .models import Titles
+
+
+class NameSlugValuesSerializer:
+    """Аналог CategoriesSerializer и GenresSerializer."""
+    fields = ('name', 'slug')
+
+    def get_queryset(self, queryset):
+        return queryset.values(*self.fields)
+
+    def to_representation(self, rows):
+        return list(rows)
+
+
+class TitlesValuesSerializer:
+    """
+    Аналог TitlesReadSerializer. ``only`` - поля ответа из ``?fields=``:
+    выбираются только их колонки, жанры без поля ``genre`` не загружаются.
+    """
+    # Поле ответа -> колонки .values(), в порядке полей ответа.
+    columns = {
+        'id': ('id', ),
+        'category': ('category__name', 'category__slug'),
+        'genre': (),
+        'rating': ('score_sum', 'review_count'),
+        'name': ('name', ),
+        'year': ('year', ),
+        'description': ('description', ),
+    }
+
+    def __init__(self, only=None):
+        self.output = [name for name in self.columns
+                       if only is None or name in only]
+
+    @property
+    def fields(self):
+        # id нужен для жанров и курсора, даже если его нет в ответе.
+        return ('id', *(column for name in self.output
+                        for column in self.columns[name] if column != 'id'))
+
+    def get_queryset(self, queryset):
+        return queryset.prefetch_related(None).values(*self.fields)
+
+    def get_genres(self, rows):
+        genres = {}
+        for title_id, name, slug in (
+                Titles.genre.through.objects
+                .filter(titles_id__in=[row['id'] for row in rows])
+                .order_by('genres__slug')
+                .values_list('titles_id', 'genres__name', 'genres__slug')):
+            genres.setdefault(title_id, []).append(
+                {'name': name, 'slug': slug})
+        return genres
+
+    def represent(self, row, genres):
+        category = None
+        if row.get('category__slug') is not None:
+            category = {'name': row['category__name'],
+                        'slug': row['category__slug']}
+        rating = None
+        if row.get('review_count'):
+            rating = row['score_sum'] / row['review_count']
+        return {
+            'id': row['id'],
+            'category': category,
+            'genre': genres.get(row['id'], []),
+            'rating': rating,
+            'name': row.get('name'),
+            'year': row.get('year'),
+            'description': row.get('description'),
+        }
+
+    def to_representation(self, rows):
+        rows = list(rows)
+        genres = self.get_genres(rows) if 'genre' in self.output else {}
+        result = []
+        for row in rows:
+            item = self.represent(row, genres)
+            result.append({name: item[name] for name in self.output})
+        return result
@@ -1,21 +1,41 @@
+import hashlib
+
 from api_yamdb.settings import DEFAULT_FROM_EMAIL
 from django.contrib.auth import get_user_model
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import transaction
+from django.db.models import F, Prefetch
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.http import parse_etags
+from django_filters.rest_framework import DjangoFilterBackend
+from django_filters.utils import translate_validation
 from rest_framework import filters, mixins, pagination, permissions, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import GenericViewSet, ModelViewSet
 
-from .filters import TitleFilter
-from .models import Categories, Genres, Review, Titles
+from .autocomplete import completions
+from .export import iter_csv, iter_ndjson, iter_titles
+from .facets import FACETS, title_facets
+from .filters import (CommentSearchFilter, ReviewSearchFilter, TitleFilter,
+                      UserFilter)
+from .fuzzy import fuzzy_titles
+from .models import (Categories, Comment, EmailOutbox, Genres, Review,
+                     Titles)
+from .pagination import (OptionalCursorPagination, PubDateCursorPagination,
+                         TitleCursorPagination, UncountedPagination)
 from .permissions import (IsAdmin, IsAdminOrReadOnly,
                           IsOwnerOrAdminOrModeratorOrReadOnly)
-from .serializers import (CategoriesSerializer, CommentSerializer,
-                          EmailSerializer, GenresSerializer, ReviewSerializer,
-                          TitlesSerializer, UserSerializer)
+from .response_cache import category_lists, genre_lists
+from .serializers import (CategoriesSerializer, CommentSearchSerializer,
+                          CommentSerializer, EmailSerializer,
+                          GenresSerializer, ReviewSearchSerializer,
+                          ReviewSerializer, TitleIdsSerializer,
+                          TitlesReadSerializer, TitlesSerializer,
+                          UserSerializer, requested_fields)
+from .values import NameSlugValuesSerializer, TitlesValuesSerializer
 
 User = get_user_model()
 
@@ -33,49 +53,127 @@ class SendConfirmEmailView(APIView):
         user = User.objects.get_or_create(email=email, username=username)[0]
         confirmation_code = user._gen_confirm_code()
         message = (f'confirmation_code: {confirmation_code}')
-        send_mail(
+        EmailOutbox.objects.create(
             subject='e-mail confirmation',
             message=message,
             from_email=DEFAULT_FROM_EMAIL,
-            recipient_list=[],
-            fail_silently=False,
+            recipient=email,
         )
         return Response({'detail': 'email was sent'},
                         status=status.HTTP_200_OK)
 
 
+class AutocompleteView(APIView):
+    """Подсказки по началу слов в названиях, ``?q=...&limit=10``."""
+    permission_classes = [permissions.AllowAny]
+    max_limit = 50
+
+    def get(self, request):
+        limit = request.query_params.get('limit', '10')
+        if not limit.isdigit() or not 0 < int(limit) <= self.max_limit:
+            raise ValidationError(
+                {'limit': f'Expected a number from 1 to {self.max_limit}.'})
+        return Response(completions.complete(
+            request.query_params.get('q', ''), int(limit)))
+
+
 class UserView(ModelViewSet):
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated, IsAdmin, ]
-    queryset = User.objects.all()
+    queryset = User.objects.order_by('id')
     lookup_field = 'username'
     lookup_url_kwarg = 'username'
-    filter_backends = [filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filterset_class = UserFilter
     search_fields = ['username', ]
-    pagination_class = pagination.PageNumberPagination
+    pagination_class = OptionalCursorPagination
 
     @action(detail=False, methods=['get', 'patch'],
             permission_classes=[permissions.IsAuthenticated, ])
     def me(self, request):
+        user = get_object_or_404(User, pk=request.user.pk)
         if request.method == 'GET':
-            serializer = UserSerializer(self.request.user)
+            serializer = UserSerializer(user)
             return Response(serializer.data)
 
-        serializer = UserSerializer(self.request.user, data=request.data,
-                                    partial=True)
+        serializer = UserSerializer(user, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
-        serializer.save(role=self.request.user.role)
+        serializer.save(role=user.role)
         return Response(serializer.data)
 
 
+class ValuesListMixin:
+    """
+    Отдаёт list через ``values_serializer_class``: строки .values()
+    вместо экземпляров моделей и ModelSerializer.
+    """
+    values_serializer_class = None
+
+    def get_values_serializer(self):
+        return self.values_serializer_class()
+
+    def list(self, request, *args, **kwargs):
+        if self.values_serializer_class is None:
+            return super().list(request, *args, **kwargs)
+        values_serializer = self.get_values_serializer()
+        queryset = values_serializer.get_queryset(
+            self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                values_serializer.to_representation(page))
+        return Response(values_serializer.to_representation(queryset))
+
+
+class CachedListMixin:
+    """
+    Отдаёт анонимным пользователям list из ``list_cache``. Ключ
+    вычисляется до запроса к базе, поэтому ответ, собранный во время
+    инвалидации, попадает под старую версию и не будет прочитан.
+    """
+    list_cache = None
+
+    def list(self, request, *args, **kwargs):
+        if self.list_cache is None or not self.list_cache.cacheable(request):
+            return super().list(request, *args, **kwargs)
+        key = self.list_cache.key(request)
+        response = self.list_cache.get(key)
+        if response is not None:
+            return response
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response.accepted_renderer = request.accepted_renderer
+            response.accepted_media_type = request.accepted_media_type
+            response.renderer_context = self.get_renderer_context()
+            response.render()
+            self.list_cache.set(key, response)
+        return response
+
+
 class GetPostDelMixin(mixins.CreateModelMixin, mixins.ListModelMixin,
                       mixins.DestroyModelMixin, GenericViewSet):
-    pass
+    list_cache = None
+
+    def invalidate(self):
+        # Сброс после фиксации: иначе ответ, прочитанный до неё
+        # другим запросом, снова попал бы в кэш. Кэш slug и индексы
+        # в памяти обновляют сигналы модели.
+        transaction.on_commit(self.list_cache.invalidate)
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        self.invalidate()
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        self.invalidate()
 
 
-class CategoriesView(GetPostDelMixin):
+class CategoriesView(CachedListMixin, ValuesListMixin, GetPostDelMixin):
     queryset = Categories.objects.all()
     serializer_class = CategoriesSerializer
+    list_cache = category_lists
+    values_serializer_class = NameSlugValuesSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly,
                           IsAdminOrReadOnly]
     filter_backends = [filters.SearchFilter]
@@ -85,9 +183,11 @@ class CategoriesView(GetPostDelMixin):
     lookup_url_kwarg = 'slug'
 
 
-class GenreViews(GetPostDelMixin):
+class GenreViews(CachedListMixin, ValuesListMixin, GetPostDelMixin):
     queryset = Genres.objects.all()
     serializer_class = GenresSerializer
+    list_cache = genre_lists
+    values_serializer_class = NameSlugValuesSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly,
                           IsAdminOrReadOnly]
     filter_backends = [filters.SearchFilter]
@@ -96,41 +196,385 @@ class GenreViews(GetPostDelMixin):
     lookup_field = 'slug'
     lookup_url_kwarg = 'slug'
 
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            Titles.bump_version(genre=instance)
+            super().perform_destroy(instance)
+
+
+class ConditionalGetMixin:
+    """
+    ETag для list и retrieve из счётчиков версий, без рендеринга тела.
+    При совпадении с If-None-Match возвращается 304 до обращения
+    к сериализатору.
+    """
+
+    def get_etag_version(self, instance=None):
+        """
+        Версия ресурса. Без ``instance`` читается отдельным запросом до
+        выборки данных, с ``instance`` - из уже загруженного объекта.
+        None - ETag не выдаётся.
+        """
+        return None
+
+    def set_etag(self, request, response, version):
+        if version is None or response.status_code not in (
+                status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            return response
+        # Разные страницы и форматы одного ресурса - разные представления.
+        variant = (f'{request.accepted_renderer.format}:'
+                   f'{request.get_full_path()}')
+        digest = hashlib.md5(variant.encode()).hexdigest()[:16]
+        response['ETag'] = f'"{version}-{digest}"'
+        return response
+
+    def conditional(self, handler, request, *args, **kwargs):
+        version = self.get_etag_version()
+        response = None
+        if version is not None and 'If-None-Match' in request.headers:
+            response = self.set_etag(
+                request, Response(status=status.HTTP_304_NOT_MODIFIED),
+                version)
+            etags = parse_etags(request.headers['If-None-Match'])
+            if response['ETag'] not in etags and '*' not in etags:
+                response = None
+        if response is None:
+            response = self.set_etag(
+                request, handler(request, *args, **kwargs), version)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        if 'If-None-Match' in request.headers:
+            return self.conditional(super().retrieve,
+                                    request, *args, **kwargs)
+        # Без условного заголовка версия берётся из загруженного объекта.
+        instance = self.get_object()
+        response = Response(self.get_serializer(instance).data)
+        return self.set_etag(request, response,
+                             self.get_etag_version(instance))
+
+
+class ProjectionMixin:
+    """
+    Для ``?fields=`` загружает через .only() только колонки запрошенных
+    полей. ``sparse_columns`` - колонки поля, если они не совпадают с его
+    именем, ``sparse_required`` - колонки, нужные всегда.
+    """
+    sparse_columns = {}
+    sparse_required = ('id', )
+
+    def get_requested_fields(self):
+        if 'fields' not in self.request.query_params:
+            return None
+        return requested_fields(self.request,
+                                self.get_serializer_class()().fields)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.get_requested_fields()
+        if fields is None:
+            return queryset
+        return self.project_queryset(queryset, fields)
+
+    def project_queryset(self, queryset, fields):
+        columns = set(self.sparse_required)
+        for name in fields:
+            columns.update(self.sparse_columns.get(name, (name, )))
+        return queryset.only(*columns)
+
+
+def title_versions(title_id, *fields):
+    if not str(title_id).isdigit():
+        return None
+    return (Titles.objects.filter(pk=title_id)
+            .values_list(*fields)[:1] or [None])[0]
+
 
-class TitleViews(ModelViewSet):
-    queryset = Titles.objects.annotate(rating=Avg('reviews__score'))
+class TitleViews(ConditionalGetMixin, ProjectionMixin, ValuesListMixin,
+                 ModelViewSet):
+    queryset = (Titles.objects.select_related('category')
+                .prefetch_related(Prefetch('genre',
+                                           Genres.objects.order_by('slug')))
+                .order_by('id'))
     serializer_class = TitlesSerializer
+    values_serializer_class = TitlesValuesSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly,
                           IsAdminOrReadOnly]
-    pagination_class = pagination.PageNumberPagination
+    pagination_class = TitleCursorPagination
     filterset_class = TitleFilter
+    sparse_columns = {
+        'category': ('category', 'category__name', 'category__slug'),
+        'genre': (),
+        'rating': ('score_sum', 'review_count'),
+    }
+    sparse_required = ('id', 'version', 'reviews_version')
+
+    def get_serializer_class(self):
+        if self.request.method in permissions.SAFE_METHODS:
+            return TitlesReadSerializer
+        return TitlesSerializer
+
+    def get_values_serializer(self):
+        return self.values_serializer_class(self.get_requested_fields())
+
+    def project_queryset(self, queryset, fields):
+        queryset = super().project_queryset(queryset, fields)
+        if 'category' not in fields:
+            queryset = queryset.select_related(None)
+        if 'genre' not in fields:
+            queryset = queryset.prefetch_related(None)
+        return queryset
+
+    def get_etag_version(self, instance=None):
+        if self.action != 'retrieve':
+            return None
+        if instance is not None:
+            versions = (instance.version, instance.reviews_version)
+        else:
+            versions = title_versions(self.kwargs['pk'],
+                                      'version', 'reviews_version')
+        return versions and '%d.%d' % versions
+
+    def update_completions(self, serializer):
+        title = serializer.instance
+        genres = serializer.validated_data.get('genre')
+        genre_ids = None if genres is None else [genre.pk for genre in genres]
+        transaction.on_commit(lambda: completions.set_title(
+            title.pk, title.name, title.category_id, genre_ids))
+        transaction.on_commit(lambda: fuzzy_titles.set_title(
+            title.pk, title.name))
+        transaction.on_commit(lambda: title_facets.set_title(
+            title.pk, title.category_id, genre_ids, title.year))
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        self.update_completions(serializer)
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        # Titles.save() увеличивает version и не трогает рейтинг.
+        super().perform_update(serializer)
+        self.update_completions(serializer)
+
+    @action(detail=False, methods=['get', 'post'],
+            permission_classes=[permissions.AllowAny])
+    def batch(self, request):
+        """
+        Произведения по списку id: ``?ids=1,2,3`` или POST ``{"ids": [...]}``
+        для длинных списков. Ответ в порядке запроса, без повторов,
+        несуществующие id пропускаются. Запросов к базе столько же, сколько
+        для одной страницы списка.
+        """
+        if request.method == 'POST':
+            data = request.data
+        else:
+            data = {'ids': request.query_params.get('ids', '').split(',')}
+        ids_serializer = TitleIdsSerializer(data=data)
+        ids_serializer.is_valid(raise_exception=True)
+        ids = list(dict.fromkeys(ids_serializer.validated_data['ids']))
+        fields = self.get_requested_fields()
+        # id нужен, чтобы восстановить порядок запроса.
+        values_serializer = self.values_serializer_class(
+            None if fields is None else fields | {'id'})
+        rows = values_serializer.to_representation(
+            values_serializer.get_queryset(
+                Titles.objects.filter(id__in=ids)))
+        by_id = {row['id']: row for row in rows}
+        if fields is not None and 'id' not in fields:
+            for row in rows:
+                del row['id']
+        return Response([by_id[pk] for pk in ids if pk in by_id])
+
+    @action(detail=False, methods=['get'],
+            permission_classes=[permissions.AllowAny])
+    def facets(self, request):
+        """
+        Число произведений для каждого жанра, категории и года среди
+        подходящих под те же фильтры, что и у списка. Фильтры по фасетам
+        считаются по индексу в памяти без запросов к базе, текстовые
+        фильтры выбирают id произведений одним запросом.
+        """
+        filterset = TitleFilter(request.query_params,
+                                queryset=Titles.objects.all(),
+                                request=request)
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        data = filterset.form.cleaned_data
+        facets = {name: data[name] for name in FACETS
+                  if data.get(name) not in (None, '')}
+        if 'year' in facets:
+            facets['year'] = int(facets['year'])
+        pks = None
+        if any(data.get(name) for name in filterset.filters
+               if name not in FACETS):
+            pks = filterset.qs.order_by().values_list('id', flat=True)
+        return Response(title_facets.counts(facets, pks))
+
+    @action(detail=False, methods=['get'],
+            permission_classes=[permissions.IsAuthenticated, IsAdmin, ])
+    def export(self, request):
+        export_type = request.query_params.get('type', 'ndjson')
+        after = request.query_params.get('after', '0')
+        if export_type not in ('ndjson', 'csv'):
+            raise ValidationError({'type': 'Expected `ndjson` or `csv`.'})
+        if not after.isdigit():
+            raise ValidationError({'after': 'Expected a title id.'})
+        titles = iter_titles(after=int(after))
+        if export_type == 'csv':
+            return StreamingHttpResponse(iter_csv(titles),
+                                         content_type='text/csv')
+        return StreamingHttpResponse(iter_ndjson(titles),
+                                     content_type='application/x-ndjson')
+
+
+class NestedViewSetMixin:
+    """
+    Вложенный ресурс. ``parent_lookups`` сопоставляет параметры URL с
+    путями фильтрации от дочерней модели, ``parent_field`` - поле ближайшего
+    родителя. Вся цепочка родителей проверяется в том же запросе, что
+    выбирает дочерние объекты.
+    """
+    parent_field = None
+    parent_lookups = {}
+
+    def get_parent_filter(self):
+        return {lookup: self.kwargs[kwarg]
+                for kwarg, lookup in self.parent_lookups.items()}
+
+    def get_queryset(self):
+        return super().get_queryset().filter(**self.get_parent_filter())
 
+    def parent_exists(self):
+        parent_id = f'{self.parent_field}_id'
+        prefix = f'{self.parent_field}__'
+        lookups = {}
+        for lookup, value in self.get_parent_filter().items():
+            if lookup == parent_id:
+                lookups['pk'] = value
+            else:
+                lookups[lookup[len(prefix):]] = value
+        parent_model = (self.queryset.model._meta
+                        .get_field(self.parent_field).related_model)
+        return parent_model.objects.filter(**lookups).exists()
 
-class ReviewViewSet(ModelViewSet):
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        results = response.data
+        if isinstance(results, dict):
+            results = results['results']
+        # Пустой список может означать несуществующего родителя.
+        if not results and not self.parent_exists():
+            raise Http404
+        return response
+
+    def check_parent(self):
+        if not self.parent_exists():
+            raise Http404
+
+    def get_parent_save_kwargs(self):
+        parent_id = f'{self.parent_field}_id'
+        kwarg = next(kwarg for kwarg, lookup in self.parent_lookups.items()
+                     if lookup == parent_id)
+        field = self.queryset.model._meta.get_field(self.parent_field)
+        # Значение из URL - строка, в объекте нужен тип ключа родителя.
+        return {parent_id: field.target_field.to_python(self.kwargs[kwarg])}
+
+
+class AuthorProjectionMixin(ProjectionMixin):
+    sparse_columns = {'author': ('author', 'author__username')}
+    sparse_required = ('id', 'pub_date')
+
+    def project_queryset(self, queryset, fields):
+        queryset = super().project_queryset(queryset, fields)
+        if 'author' not in fields:
+            queryset = queryset.select_related(None)
+        return queryset
+
+
+class ReviewViewSet(ConditionalGetMixin, AuthorProjectionMixin,
+                    NestedViewSetMixin, ModelViewSet):
+    queryset = (Review.objects.select_related('author')
+                .order_by('-pub_date', '-id'))
     serializer_class = ReviewSerializer
     permission_classes = (IsOwnerOrAdminOrModeratorOrReadOnly,
                           permissions.IsAuthenticatedOrReadOnly, )
-    pagination_class = pagination.PageNumberPagination
+    pagination_class = PubDateCursorPagination
+    parent_field = 'title'
+    parent_lookups = {'title_id': 'title_id'}
 
+    def get_etag_version(self, instance=None):
+        if self.action != 'list':
+            return None
+        versions = title_versions(self.kwargs['title_id'],
+                                  'reviews_version', 'review_count')
+        if versions is None:
+            return None
+        # Количество отзывов уже есть в произведении, COUNT не нужен.
+        self.paginator_count = versions[1]
+        return versions[0]
+
+    # Рейтинг меняют обработчики pre_save, post_save и post_delete
+    # по оценке, прочитанной из базы под блокировкой.
     def perform_create(self, serializer):
-        title = get_object_or_404(Titles, id=self.kwargs['title_id'])
-        serializer.save(title=title, author=self.request.user)
+        # Чтение вынесено из транзакции: в SQLite транзакция, начатая
+        # с чтения, не может дождаться блокировки на запись.
+        self.check_parent()
+        with transaction.atomic():
+            serializer.save(author_id=self.request.user.pk,
+                            **self.get_parent_save_kwargs())
 
-    def get_queryset(self):
-        title = get_object_or_404(Titles, id=self.kwargs['title_id'])
-        return title.reviews.all()
+    @transaction.atomic
+    def perform_update(self, serializer):
+        # Удалённый параллельно отзыв save() создал бы заново.
+        if Review.locked_score(serializer.instance.pk) is None:
+            raise Http404
+        serializer.save()
 
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.score = Review.locked_score(instance.pk)
+        if instance.score is None:
+            raise Http404
+        instance.delete()
 
-class CommentViewSet(ModelViewSet):
+
+class CommentViewSet(AuthorProjectionMixin, NestedViewSetMixin,
+                     ModelViewSet):
+    queryset = (Comment.objects.select_related('author')
+                .order_by('-pub_date', '-id'))
     serializer_class = CommentSerializer
     permission_classes = (IsOwnerOrAdminOrModeratorOrReadOnly,
                           permissions.IsAuthenticatedOrReadOnly, )
-    pagination_class = pagination.PageNumberPagination
+    pagination_class = PubDateCursorPagination
+    parent_field = 'review'
+    parent_lookups = {'title_id': 'review__title_id',
+                      'review_id': 'review_id'}
 
     def perform_create(self, serializer):
-        review = get_object_or_404(Review, id=self.kwargs['review_id'])
-        serializer.save(review=review, author=self.request.user)
+        self.check_parent()
+        serializer.save(author_id=self.request.user.pk,
+                        **self.get_parent_save_kwargs())
 
-    def get_queryset(self):
-        review = get_object_or_404(Review, id=self.kwargs['review_id'])
-        return review.comments.all()
+
+class ReviewSearchViewSet(mixins.ListModelMixin, GenericViewSet):
+    """
+    Полнотекстовый поиск по отзывам: ``?q=`` обязателен, ``?title=``
+    и ``?author=`` сужают поиск. Страницы без COUNT: на частых словах
+    подсчёт всех совпадений обходится дороже самой страницы.
+    """
+    queryset = Review.objects.select_related('author')
+    serializer_class = ReviewSearchSerializer
+    permission_classes = [permissions.AllowAny]
+    filterset_class = ReviewSearchFilter
+    pagination_class = UncountedPagination
+
+
+class CommentSearchViewSet(ReviewSearchViewSet):
+    """Полнотекстовый поиск по комментариям, ещё и с ``?review=``."""
+    queryset = (Comment.objects.select_related('author')
+                .annotate(title_id=F('review__title_id')))
+    serializer_class = CommentSearchSerializer
+    filterset_class = CommentSearchFilter
@@ -4,13 +4,57 @@ ASGI config for YaMDb project.
 It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
-https://docs.djangoproject.com/en/3.0/howto/deployment/asgi/
+https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 """
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIHandler, ASGIRequest
+
+from api.memory_index import MemoryIndex
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
 
-application = get_asgi_application()
+
+class AsyncReadsRequest(ASGIRequest):
+    # Django разрешает путь по request.urlconf, если он задан, поэтому
+    # асинхронные пути чтения подключаются только для запросов через
+    # этот вход, а settings.ROOT_URLCONF остаётся прежним.
+    urlconf = 'api_yamdb.asgi_urls'
+
+
+class AsyncReadsHandler(ASGIHandler):
+    request_class = AsyncReadsRequest
+
+    async def send_response(self, response, send):
+        """
+        Django 3.2 перебирает потоковый ответ прямо в цикле событий,
+        а генераторы выгрузки (titles/export/) читают базу. Части такого
+        ответа берутся в потоке синхронных представлений и отправляются
+        перед завершающим сообщением.
+        """
+        if not response.streaming:
+            return await super().send_response(response, send)
+        parts = iter(response)
+        response.streaming_content = ()
+        next_part = sync_to_async(next, thread_sensitive=True)
+
+        async def send_parts(message):
+            if message == {'type': 'http.response.body'}:
+                part = await next_part(parts, None)
+                while part is not None:
+                    for chunk, _ in self.chunk_bytes(part):
+                        await send({'type': 'http.response.body',
+                                    'body': chunk, 'more_body': True})
+                    part = await next_part(parts, None)
+            await send(message)
+
+        await super().send_response(response, send_parts)
+
+
+django.setup(set_prefix=False)
+application = AsyncReadsHandler()
+
+MemoryIndex.warm_up()
@@ -0,0 +1,11 @@
+"""
+URL-конфигурация для ASGI: асинхронные пути чтения api.async_urls,
+затем все пути api_yamdb.urls.
+"""
+from django.urls import include, path
+
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('api/', include('api.async_urls')),
+] + sync_urlpatterns
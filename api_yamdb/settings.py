@@ -35,7 +35,7 @@ INSTALLED_APPS = [
 
     'django.contrib.admin',
     'django.contrib.auth',
-    'api',
+    'api.apps.ApiConfig',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
@@ -52,10 +52,13 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Запросы через asgi.py разрешаются по api_yamdb.asgi_urls
+# с асинхронными путями чтения.
 ROOT_URLCONF = 'api_yamdb.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
@@ -85,9 +88,85 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 600,
     }
 }
 
+# Копии default только для чтения, обновляются командой refresh_replicas.
+# Пример реплики:
+#   DATABASES['replica1'] = {
+#       'ENGINE': 'django.db.backends.sqlite3',
+#       'NAME': os.path.join(BASE_DIR, 'db.replica1.sqlite3'),
+#       'CONN_MAX_AGE': 0,
+#       'TEST': {'MIRROR': 'default'},
+#   }
+#   DATABASE_REPLICAS = ['replica1']
+# Для нескольких процессов кэш из CACHES должен быть общим: через него
+# клиент после записи какое-то время читает из default.
+DATABASE_REPLICAS = []
+DATABASE_ROUTERS = ['api.routers.ReplicaRouter']
+REPLICA_STICKY_SECONDS = 60
+
+# Выполняются для каждого нового соединения с SQLite (api.signals).
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'busy_timeout': 20000,
+}
+
+# По умолчанию файловый кэш, общий для всех процессов на сервере: через
+# него процессы узнают об отзыве токенов и сбросе списков. Бэкенд
+# и каталог задаются переменными окружения, например:
+#   DJANGO_CACHE_LOCATION=/var/tmp/api_yamdb_cache
+# Кэш в памяти процесса (LocMemCache) подходит только для одного
+# процесса и требует TOKEN_VERSION_CACHE_SECONDS = 0.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'DJANGO_CACHE_BACKEND',
+            'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.environ.get(
+            'DJANGO_CACHE_LOCATION', os.path.join(BASE_DIR, 'cache')),
+    }
+}
+
+# Сколько секунд версия токенов пользователя (api.authentication) может
+# браться из кэша: запрос с токеном читает её из кэша, а не из базы.
+# 0 - читается из базы при каждом запросе по первичному ключу. Кэш
+# должен быть общим для процессов (проверка api.E001).
+# Токены отзывает только увеличение token_version: его делают
+# CustomUser.save() и CustomUser.revoke_tokens() (load_csv --update) и
+# сразу обновляют кэш. Роль, изменённая в обход них (QuerySet.update,
+# bulk_update), старые токены не отзывает никогда; token_version,
+# изменённый в обход них, действует через TOKEN_VERSION_CACHE_SECONDS.
+TOKEN_VERSION_CACHE_SECONDS = 300
+
+# Время жизни закэшированных ответов анонимным пользователям
+# (api.response_cache), секунды.
+LIST_CACHE_TIMEOUT = 300
+
+# Как часто индекс автодополнения (api.autocomplete) перечитывается
+# из базы, чтобы увидеть записи других процессов, секунды.
+AUTOCOMPLETE_REBUILD_SECONDS = 300
+
+# То же для триграммного индекса нечёткого поиска (api.fuzzy) и
+# минимальная доля триграмм запроса, которая должна быть в названии.
+FUZZY_REBUILD_SECONDS = 300
+FUZZY_THRESHOLD = 0.4
+
+# То же для счётчиков фасетов произведений (api.facets).
+FACETS_REBUILD_SECONDS = 300
+
+# Начинать построение индексов в памяти в фоне при запуске процесса
+# (api_yamdb.wsgi, api_yamdb.asgi), а не на первом запросе к ним.
+MEMORY_INDEXES_WARM_UP = True
+
+# Поиск по отзывам и комментариям без фильтров ранжирует столько
+# последних совпадений.
+TEXT_SEARCH_WINDOW = 10000
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
@@ -135,7 +214,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.ClaimsJWTAuthentication',
     ],
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
     'PAGE_SIZE': 50
@@ -0,0 +1,89 @@
+"""
+Пропускная способность чтения: WSGI в пуле потоков против ASGI
+с асинхронными путями чтения и ASGI с синхронными представлениями.
+
+    python -m benchmarks.bench_asgi --requests 400 --concurrency 16
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .common import setup_database
+
+URLS = ('/api/v1/titles/', '/api/v1/categories/', '/api/v1/genres/')
+
+
+def fill(titles):
+    from api.models import Categories, Genres, Titles
+
+    category = Categories.objects.create(name='Фильмы', slug='films')
+    genre = Genres.objects.create(name='Драма', slug='drama')
+    for number in range(titles):
+        title = Titles.objects.create(name=f'Произведение {number}',
+                                      year=2000, category=category)
+        title.genre.add(genre)
+
+
+def run_wsgi(count, concurrency):
+    from django.test import Client
+
+    def get(number):
+        response = Client().get(URLS[number % len(URLS)])
+        assert response.status_code == 200
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        list(executor.map(get, range(count)))
+    return count / (time.perf_counter() - start)
+
+
+def run_asgi(count, concurrency, urlconf):
+    from django.test import AsyncClient
+    from django.test.utils import override_settings
+
+    async def worker(numbers):
+        client = AsyncClient()
+        for number in numbers:
+            response = await client.get(URLS[number % len(URLS)])
+            assert response.status_code == 200
+
+    async def main():
+        await asyncio.gather(*(worker(range(offset, count, concurrency))
+                               for offset in range(concurrency)))
+
+    with override_settings(ROOT_URLCONF=urlconf):
+        start = time.perf_counter()
+        asyncio.run(main())
+        return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--titles', type=int, default=50)
+    args = parser.parse_args()
+
+    # Потокам нужна общая база, поэтому она создаётся в файле.
+    path = os.path.join(tempfile.mkdtemp(), 'bench_asgi.sqlite3')
+    teardown = setup_database(path)
+    try:
+        fill(args.titles)
+        results = (
+            ('WSGI, threads', run_wsgi(args.requests, args.concurrency)),
+            ('ASGI, async reads',
+             run_asgi(args.requests, args.concurrency, 'api_yamdb.asgi_urls')),
+            ('ASGI, sync views',
+             run_asgi(args.requests, args.concurrency, 'api_yamdb.urls')),
+        )
+        for name, rate in results:
+            print(f'{name:20} {rate:8.0f} req/s')
+    finally:
+        teardown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""
+Подсказки автодополнения по индексу в памяти: время построения
+и поиска для префиксов разной длины.
+
+    python -m benchmarks.bench_autocomplete --titles 200000
+"""
+import argparse
+import time
+
+from .bench_title_search import fill
+from .common import setup_database, timeit
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--titles', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    teardown = setup_database()
+    try:
+        run(args.titles, args.repeat)
+    finally:
+        teardown()
+
+
+def run(count, repeat):
+    from api.autocomplete import completions
+
+    fill(count)
+    start = time.perf_counter()
+    completions.rebuild()
+    print(f'build {count} titles: {time.perf_counter() - start:.2f} s')
+    for prefix in ('з', 'зв', 'звез', 'звезда ночь', '12345'):
+        # Первый вызов - без запомненного результата.
+        completions._memo.clear()
+        first = timeit(lambda: completions.complete(prefix), 1)
+        best = timeit(lambda: completions.complete(prefix), repeat)
+        print(f'{prefix!r:15} first {first:8.3f} ms, repeated {best:8.3f} ms')
+
+
+if __name__ == '__main__':
+    main()
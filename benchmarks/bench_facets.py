@@ -0,0 +1,105 @@
+"""
+Фасеты произведений: прежний способ браузера (по запросу COUNT на каждое
+значение жанра, категории и года), три запроса GROUP BY и счётчики
+api.facets без фильтров, с одним фильтром и с несколькими.
+
+    python -m benchmarks.bench_facets --titles 200000
+"""
+import argparse
+import random
+import time
+
+from .common import setup_database, timeit
+
+GENRES = 40
+CATEGORIES = 10
+YEARS = range(1950, 2025)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--titles', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    teardown = setup_database()
+    try:
+        run(args.titles, args.repeat)
+    finally:
+        teardown()
+
+
+def fill(count):
+    """Произведения с категорией, годом и 1-3 жанрами."""
+    from api.models import Categories, Genres, Titles
+
+    Genres.objects.bulk_create(Genres(name=f'Жанр {number}',
+                                      slug=f'genre{number}')
+                               for number in range(GENRES))
+    Categories.objects.bulk_create(Categories(name=f'Категория {number}',
+                                              slug=f'category{number}')
+                                   for number in range(CATEGORIES))
+    genre_ids = list(Genres.objects.values_list('id', flat=True))
+    category_ids = list(Categories.objects.values_list('id', flat=True))
+    rng = random.Random(0)
+    Through = Titles.genre.through
+    for start in range(0, count, 5000):
+        titles = Titles.objects.bulk_create(
+            Titles(pk=number + 1, name=f'Произведение {number}',
+                   year=rng.choice(YEARS),
+                   category_id=rng.choice(category_ids))
+            for number in range(start, min(start + 5000, count)))
+        Through.objects.bulk_create(
+            Through(titles_id=title.pk, genres_id=genre_id)
+            for title in titles
+            for genre_id in rng.sample(genre_ids, rng.randint(1, 3)))
+
+
+def run(count, repeat):
+    from django.db.models import Count
+
+    from api.facets import title_facets
+    from api.models import Categories, Genres, Titles
+
+    fill(count)
+    start = time.perf_counter()
+    title_facets.rebuild()
+    print(f'build {count} titles: {time.perf_counter() - start:.2f} s')
+
+    def count_each(filters):
+        titles = Titles.objects.filter(**filters)
+        for slug in Genres.objects.values_list('slug', flat=True):
+            titles.filter(genre__slug=slug).count()
+        for slug in Categories.objects.values_list('slug', flat=True):
+            titles.filter(category__slug=slug).count()
+        for year in YEARS:
+            titles.filter(year=year).count()
+
+    def group_by(filters):
+        titles = Titles.objects.filter(**filters)
+        for field in ('genre__slug', 'category__slug', 'year'):
+            list(titles.order_by().values(field).annotate(Count('id')))
+
+    def index(facets):
+        title_facets._memo.clear()
+        title_facets.counts(facets)
+
+    cases = (
+        ('no filters', {}, {}),
+        ('genre', {'genre__slug': 'genre0'}, {'genre': 'genre0'}),
+        ('genre + year', {'genre__slug': 'genre0', 'year': 2000},
+         {'genre': 'genre0', 'year': 2000}),
+        ('3 filters', {'genre__slug': 'genre0', 'year': 2000,
+                       'category__slug': 'category0'},
+         {'genre': 'genre0', 'year': 2000, 'category': 'category0'}),
+    )
+    for label, filters, facets in cases:
+        each = timeit(lambda: count_each(filters), 1)
+        grouped = timeit(lambda: group_by(filters), repeat)
+        indexed = timeit(lambda: index(facets), repeat)
+        print(f'{label:13} count each {each:9.2f} ms, '
+              f'group by {grouped:8.2f} ms, index {indexed:8.3f} ms')
+
+
+if __name__ == '__main__':
+    main()
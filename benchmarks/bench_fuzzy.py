@@ -0,0 +1,84 @@
+"""
+Нечёткий поиск по триграммному индексу на синтетических каталогах
+разного размера: время построения и поиска с опечатками. Индекс
+строится из названий в памяти, без заполнения базы.
+
+    python -m benchmarks.bench_fuzzy --titles 100000,1000000
+"""
+import argparse
+import random
+import time
+from itertools import accumulate
+
+from .common import timeit
+
+CONSONANTS = 'бвгджзклмнпрстфхцчшщ'
+VOWELS = 'аеиоуыэюя'
+
+
+def catalog(count, seed=0):
+    """
+    Названия из 1-4 слов словаря в 50000 слов из случайных слогов,
+    частоты слов - по закону Ципфа.
+    """
+    rng = random.Random(seed)
+    syllables = [c + v for c in CONSONANTS for v in VOWELS]
+    syllables += [s + c for s in syllables[::3] for c in CONSONANTS[::2]]
+    words = [''.join(rng.choices(syllables, k=rng.randint(1, 3)))
+             for _ in range(50000)]
+    weights = list(accumulate(1 / rank for rank in range(1, len(words) + 1)))
+    for pk in range(1, count + 1):
+        yield pk, ' '.join(rng.choices(words, cum_weights=weights,
+                                       k=rng.randint(1, 4)))
+
+
+def misspell(name, rng):
+    """Опечатка: заменяет одну букву в самом длинном слове названия."""
+    words = name.split()
+    longest = max(range(len(words)), key=lambda number: len(words[number]))
+    word = words[longest]
+    position = rng.randrange(len(word))
+    letter = rng.choice(CONSONANTS if word[position] in CONSONANTS
+                        else VOWELS)
+    words[longest] = word[:position] + letter + word[position + 1:]
+    return ' '.join(words)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--titles', default='100000,1000000')
+    parser.add_argument('--queries', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    for count in map(int, args.titles.split(',')):
+        run(count, args.queries, args.repeat)
+
+
+def run(count, queries, repeat):
+    from api.fuzzy import FuzzyTitleIndex
+
+    names = dict(catalog(count))
+    index = FuzzyTitleIndex()
+    start = time.perf_counter()
+    index.install(index.build_state(names.items()))
+    index._built_at = time.monotonic()
+    index._loaded = True
+    print(f'build {count} titles: {time.perf_counter() - start:.2f} s')
+
+    rng = random.Random(1)
+    pks = rng.sample(range(1, count + 1), queries)
+    times = []
+    found = 0
+    for pk in pks:
+        query = misspell(names[pk], rng)
+        times.append(timeit(lambda: index.search(query), repeat))
+        # Одинаковых названий в каталоге много, засчитывается любое.
+        found += names[pk] in {names[other]
+                               for other in index.search(query, limit=10)}
+    times.sort()
+    print(f'  median {times[len(times) // 2]:8.2f} ms, '
+          f'max {times[-1]:8.2f} ms, found {found}/{queries}')
+
+
+if __name__ == '__main__':
+    main()
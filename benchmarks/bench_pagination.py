@@ -0,0 +1,62 @@
+"""
+Сравнение стоимости первой и глубокой страницы списка произведений
+при постраничной и курсорной пагинации.
+
+    python -m benchmarks.bench_pagination --page 10000
+"""
+import argparse
+
+from .common import setup_database, timeit
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--page', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    teardown = setup_database()
+    try:
+        run(args.page, args.repeat)
+    finally:
+        teardown()
+
+
+def run(page, repeat):
+    from django.conf import settings
+    from rest_framework.pagination import Cursor
+    from rest_framework.test import APIClient
+
+    from api.models import Titles
+    from api.pagination import KeysetPagination
+
+    page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+    total = page * page_size
+    Titles.objects.bulk_create(
+        (Titles(name=f'title {i}', year=2000) for i in range(total)),
+        batch_size=5000
+    )
+    deep_id = (Titles.objects.order_by('id')
+               .values_list('id', flat=True)[(page - 1) * page_size - 1])
+
+    paginator = KeysetPagination()
+    paginator.base_url = '/api/v1/titles/'
+    paginator.cursor_query_param = 'cursor'
+    deep_cursor = paginator.encode_cursor(Cursor(0, False, str(deep_id)))
+
+    client = APIClient()
+    urls = {
+        'page=1': '/api/v1/titles/?page=1',
+        f'page={page}': f'/api/v1/titles/?page={page}',
+        'cursor first': '/api/v1/titles/?cursor=',
+        f'cursor page {page}': deep_cursor,
+    }
+    print(f'{total} titles, page size {page_size}')
+    for label, url in urls.items():
+        assert client.get(url).status_code == 200, url
+        best = timeit(lambda: client.get(url), repeat)
+        print(f'{label:>20}: {best:8.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Поиск по отзывам: прежний поиск админки (``text__icontains``, полный
+просмотр таблицы) против полнотекстового индекса reviews_fts для редкого
+и частого слова: ранжирование всех совпадений, только последних
+TEXT_SEARCH_WINDOW и с фильтром по произведению внутри индекса.
+
+    python -m benchmarks.bench_review_search --reviews 1000000
+"""
+import argparse
+import random
+from itertools import accumulate
+
+from .bench_fuzzy import CONSONANTS, VOWELS
+from .bench_title_search import fill
+from .common import setup_database, timeit
+
+USERS = 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--reviews', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    teardown = setup_database()
+    try:
+        run(args.reviews, args.repeat)
+    finally:
+        teardown()
+
+
+def fill_reviews(count):
+    """Отзывы по 10-40 слов из словаря с частотами по закону Ципфа."""
+    from django.contrib.auth import get_user_model
+
+    from api.models import Review, Titles
+
+    User = get_user_model()
+    User.objects.bulk_create(
+        User(username=f'user{number}', email=f'user{number}@yamdb.fake')
+        for number in range(USERS))
+    user_ids = list(User.objects.values_list('id', flat=True))
+    fill(count // USERS + 1)
+    title_ids = list(Titles.objects.values_list('id', flat=True))
+
+    rng = random.Random(0)
+    syllables = [c + v for c in CONSONANTS for v in VOWELS]
+    words = [''.join(rng.choices(syllables, k=rng.randint(1, 4)))
+             for _ in range(100000)]
+    weights = list(accumulate(1 / rank for rank in range(1, len(words) + 1)))
+    batch = []
+    for number in range(count):
+        text = ' '.join(rng.choices(words, cum_weights=weights,
+                                    k=rng.randint(10, 40)))
+        batch.append(Review(title_id=title_ids[number // USERS],
+                            author_id=user_ids[number % USERS],
+                            text=text, score=rng.randint(1, 10)))
+        if len(batch) == 5000:
+            Review.objects.bulk_create(batch)
+            batch = []
+    Review.objects.bulk_create(batch)
+    return words, title_ids
+
+
+def run(count, repeat):
+    from django.conf import settings
+
+    from api.models import Review
+    from api.search import REVIEWS_FTS, rank_matching
+
+    words, title_ids = fill_reviews(count)
+    reviews = Review.objects.select_related('author')
+    title_id = title_ids[len(title_ids) // 2]
+
+    def search(word, **kwargs):
+        return list(rank_matching(reviews, REVIEWS_FTS, word, ('text', ),
+                                  snippet=True, prefix=False,
+                                  **kwargs)[:50])
+
+    for label, word in (('rare', words[-1]), ('common', words[10])):
+        cases = (
+            ('icontains', lambda: list(reviews.filter(
+                text__icontains=word).order_by('-id')[:50])),
+            ('fts ranked', lambda: search(word)),
+            ('fts window', lambda: search(
+                word, window=settings.TEXT_SEARCH_WINDOW)),
+            ('fts + title', lambda: search(
+                word, keys={'title_id': title_id})),
+        )
+        for name, func in cases:
+            print(f'{label:7} {name:12} {timeit(func, repeat):8.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
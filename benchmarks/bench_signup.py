@@ -0,0 +1,85 @@
+"""
+Пропускная способность регистрации через очередь писем против прежней
+синхронной отправки. Почтовый бэкенд заменён локальной заглушкой с
+задержкой на каждое письмо.
+
+    python -m benchmarks.bench_signup --signups 500 --delay-ms 5
+"""
+import argparse
+import time
+
+from django.conf import settings
+from django.core.mail.backends.locmem import EmailBackend
+
+from .common import setup_database
+
+
+class SlowEmailBackend(EmailBackend):
+    def open(self):
+        time.sleep(settings.BENCH_EMAIL_DELAY)
+        return True
+
+    def send_messages(self, messages):
+        time.sleep(settings.BENCH_EMAIL_DELAY * len(messages))
+        return super().send_messages(messages)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--signups', type=int, default=500)
+    parser.add_argument('--delay-ms', type=float, default=5)
+    args = parser.parse_args()
+
+    teardown = setup_database()
+    try:
+        run(args.signups, args.delay_ms / 1000)
+    finally:
+        teardown()
+
+
+def signup(client, prefix, count, after_request=None):
+    start = time.perf_counter()
+    for number in range(count):
+        data = {'email': f'{prefix}{number}@yamdb.fake',
+                'username': f'{prefix}{number}'}
+        assert client.post('/api/v1/auth/email/', data=data).status_code == 200
+        if after_request is not None:
+            after_request(data)
+    return count / (time.perf_counter() - start)
+
+
+def run(count, delay):
+    from django.core.mail import send_mail
+    from django.test.utils import override_settings
+    from rest_framework.test import APIClient
+
+    from api.outbox import send_pending_emails
+
+    client = APIClient()
+    with override_settings(
+            EMAIL_BACKEND='benchmarks.bench_signup.SlowEmailBackend',
+            BENCH_EMAIL_DELAY=delay):
+
+        def send_now(data):
+            send_mail('e-mail confirmation', 'confirmation_code: ...',
+                      'auth@yambdb.com', [data['email']])
+
+        sync_rate = signup(client, 'sync', count, send_now)
+        outbox_rate = signup(client, 'outbox', count)
+
+        start = time.perf_counter()
+        sent = 0
+        while True:
+            batch = send_pending_emails(batch_size=100)
+            if not batch:
+                break
+            sent += batch
+        drain_rate = sent / (time.perf_counter() - start)
+
+    print(f'synchronous send: {sync_rate:8.0f} signups/s')
+    print(f'outbox:           {outbox_rate:8.0f} signups/s')
+    print(f'outbox drain:     {drain_rate:8.0f} emails/s ({sent} sent)')
+
+
+if __name__ == '__main__':
+    main()
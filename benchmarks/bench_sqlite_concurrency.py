@@ -0,0 +1,117 @@
+"""
+Смешанная нагрузка из потоков: чтение списка произведений и запись
+отзывов. Сравнивает SQLite по умолчанию (журнал DELETE, новое соединение
+на каждый запрос) с SQLITE_PRAGMAS и постоянными соединениями.
+
+    python -m benchmarks.bench_sqlite_concurrency --threads 8 --seconds 5
+"""
+import argparse
+import itertools
+import os
+import tempfile
+import threading
+import time
+
+from .common import setup_database
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--write-every', type=int, default=10,
+                        help='каждый N-й запрос - запись отзыва')
+    args = parser.parse_args()
+
+    from django.test.utils import override_settings
+
+    with tempfile.TemporaryDirectory() as directory:
+        for label, pragmas, persistent in (('default', {}, False),
+                                           ('tuned', None, True)):
+            overrides = {} if pragmas is None else {'SQLITE_PRAGMAS': pragmas}
+            with override_settings(**overrides):
+                teardown = setup_database(
+                    os.path.join(directory, f'{label}.sqlite3'))
+                try:
+                    run(label, persistent, args)
+                finally:
+                    teardown()
+
+
+def prepare(titles=50, users=2000):
+    from api.models import Categories, CustomUser, Titles
+    from api.serializers import MyTokenObtainPairSerializer
+
+    category = Categories.objects.create(name='Фильм', slug='movie')
+    Titles.objects.bulk_create(
+        Titles(name=f'title {i}', year=2000, category=category)
+        for i in range(titles))
+    CustomUser.objects.bulk_create(
+        CustomUser(username=f'user{i}', email=f'user{i}@yamdb.fake')
+        for i in range(users))
+    tokens = [str(MyTokenObtainPairSerializer.get_token(user).access_token)
+              for user in CustomUser.objects.all()]
+    title_ids = list(Titles.objects.values_list('id', flat=True))
+    return itertools.product(tokens, title_ids)
+
+
+class Worker(threading.Thread):
+
+    def __init__(self, pairs, pairs_lock, deadline, persistent, write_every):
+        super().__init__()
+        self.pairs = pairs
+        self.pairs_lock = pairs_lock
+        self.deadline = deadline
+        self.persistent = persistent
+        self.write_every = write_every
+        self.counts = {'reads': 0, 'writes': 0, 'errors': 0}
+
+    def request(self, client, number):
+        if number % self.write_every:
+            client.get('/api/v1/titles/')
+            return 'reads'
+        with self.pairs_lock:
+            token, title_id = next(self.pairs)
+        client.post(f'/api/v1/titles/{title_id}/reviews/',
+                    data={'text': 'Отзыв', 'score': 7},
+                    HTTP_AUTHORIZATION=f'Bearer {token}')
+        return 'writes'
+
+    def run(self):
+        from django.db import OperationalError, connection
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        number = 0
+        while time.perf_counter() < self.deadline:
+            number += 1
+            try:
+                self.counts[self.request(client, number)] += 1
+            except OperationalError:
+                self.counts['errors'] += 1
+            if not self.persistent:
+                connection.close()
+        connection.close()
+
+
+def run(label, persistent, args):
+    pairs = prepare()
+    pairs_lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+    workers = [Worker(pairs, pairs_lock, deadline, persistent,
+                      args.write_every)
+               for _ in range(args.threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    totals = {key: sum(worker.counts[key] for worker in workers)
+              for key in ('reads', 'writes', 'errors')}
+    requests = totals['reads'] + totals['writes']
+    print(f'{label:>8}: {requests / args.seconds:8.0f} req/s '
+          f'(reads {totals["reads"]}, writes {totals["writes"]}, '
+          f'errors {totals["errors"]})')
+
+
+if __name__ == '__main__':
+    main()
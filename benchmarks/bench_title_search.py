@@ -0,0 +1,65 @@
+"""
+Поиск произведений: прежний фильтр ``name__contains`` (LIKE '%x%')
+против полнотекстового индекса titles_fts.
+
+    python -m benchmarks.bench_title_search --titles 200000
+"""
+import argparse
+import random
+
+from .common import setup_database, timeit
+
+WORDS = ('тень', 'ветер', 'город', 'море', 'ночь', 'звезда', 'дорога',
+         'песня', 'огонь', 'зима', 'сад', 'мост', 'остров', 'зеркало')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--titles', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    teardown = setup_database()
+    try:
+        run(args.titles, args.repeat)
+    finally:
+        teardown()
+
+
+def fill(count):
+    from api.models import Titles
+
+    rng = random.Random(0)
+    batch = []
+    for number in range(count):
+        name = ' '.join(rng.sample(WORDS, 3)) + f' {number}'
+        description = ' '.join(rng.choices(WORDS, k=12))
+        batch.append(Titles(name=name, description=description))
+        if len(batch) == 5000:
+            Titles.objects.bulk_create(batch)
+            batch = []
+    Titles.objects.bulk_create(batch)
+
+
+def run(count, repeat):
+    from api.models import Titles
+    from api.search import filter_titles, rank_titles
+
+    fill(count)
+    # Редкое слово: номер конкретного произведения.
+    needle = str(count // 2)
+    cases = (
+        ('name contains', lambda: list(Titles.objects.filter(
+            name__contains=needle).values_list('id', flat=True)[:50])),
+        ('fts name', lambda: list(filter_titles(
+            Titles.objects.order_by('id'), needle, columns=('name', ))
+            .values_list('id', flat=True)[:50])),
+        ('fts ranked', lambda: list(rank_titles(
+            Titles.objects.all(), needle).values_list('id', flat=True)[:50])),
+    )
+    for name, func in cases:
+        print(f'{name:15} {timeit(func, repeat):8.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
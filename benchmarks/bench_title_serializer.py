@@ -0,0 +1,70 @@
+"""
+Пропускная способность сериализации списка произведений: прежний
+TitlesSerializer, пересоздававший вложенные поля для каждого объекта,
+против TitlesReadSerializer.
+
+    python -m benchmarks.bench_title_serializer --titles 10000
+"""
+import argparse
+
+from .common import setup_database, timeit
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--titles', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    teardown = setup_database()
+    try:
+        run(args.titles, args.repeat)
+    finally:
+        teardown()
+
+
+def run(count, repeat):
+    from rest_framework import serializers
+
+    from api.models import Categories, Genres, Titles
+    from api.serializers import (CategoriesSerializer, GenresSerializer,
+                                 TitlesReadSerializer, TitlesSerializer)
+
+    class LegacyTitlesSerializer(TitlesSerializer):
+        def to_representation(self, obj):
+            self.fields['category'] = CategoriesSerializer()
+            self.fields['genre'] = GenresSerializer(many=True)
+            return serializers.ModelSerializer.to_representation(self, obj)
+
+    category = Categories.objects.create(name='Фильм', slug='movie')
+    genres = [Genres.objects.create(name=f'Жанр {i}', slug=f'genre-{i}')
+              for i in range(3)]
+    Titles.objects.bulk_create(
+        (Titles(name=f'title {i}', year=2000, category=category,
+                description='description') for i in range(count)),
+        batch_size=5000
+    )
+    through = Titles.genre.through
+    through.objects.bulk_create(
+        (through(titles_id=pk, genres_id=genre.pk)
+         for pk in Titles.objects.values_list('id', flat=True)
+         for genre in genres[:2]),
+        batch_size=5000
+    )
+    titles = list(Titles.objects.select_related('category')
+                  .prefetch_related('genre').order_by('id'))
+
+    legacy = LegacyTitlesSerializer(titles, many=True).data
+    current = TitlesReadSerializer(titles, many=True).data
+    assert legacy == current
+
+    for label, serializer_class in (('legacy', LegacyTitlesSerializer),
+                                    ('read', TitlesReadSerializer)):
+        best = timeit(lambda: serializer_class(titles, many=True).data,
+                      repeat)
+        print(f'{label:>8}: {best:9.1f} ms, '
+              f'{count / best * 1000:9.0f} titles/s')
+
+
+if __name__ == '__main__':
+    main()
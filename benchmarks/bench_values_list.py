@@ -0,0 +1,65 @@
+"""
+Анонимные GET списков произведений и категорий: ModelSerializer против
+сериализации из строк .values().
+
+    python -m benchmarks.bench_values_list --titles 2000
+"""
+import argparse
+
+from .common import setup_database, timeit
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--titles', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    teardown = setup_database()
+    try:
+        run(args.titles, args.repeat)
+    finally:
+        teardown()
+
+
+def run(count, repeat):
+    from rest_framework.test import APIClient
+
+    from api import views
+    from api.models import Categories, Genres, Titles
+
+    Categories.objects.bulk_create(
+        Categories(name=f'Категория {i}', slug=f'category-{i}')
+        for i in range(50))
+    Genres.objects.bulk_create(
+        Genres(name=f'Жанр {i}', slug=f'genre-{i}') for i in range(3))
+    categories = list(Categories.objects.all())
+    genres = list(Genres.objects.all())
+    Titles.objects.bulk_create(
+        Titles(name=f'title {i}', year=2000, category=categories[i % 50],
+               description='description', score_sum=i, review_count=1)
+        for i in range(count))
+    through = Titles.genre.through
+    through.objects.bulk_create(
+        through(titles_id=pk, genres_id=genre.pk)
+        for pk in Titles.objects.values_list('id', flat=True)
+        for genre in genres[:2])
+
+    client = APIClient()
+    for url, view in (('/api/v1/titles/', views.TitleViews),
+                      ('/api/v1/categories/', views.CategoriesView)):
+        values_serializer_class = view.values_serializer_class
+        view.values_serializer_class = None
+        model_body = client.get(url).content
+        model_time = timeit(lambda: client.get(url), repeat)
+        view.values_serializer_class = values_serializer_class
+        values_body = client.get(url).content
+        values_time = timeit(lambda: client.get(url), repeat)
+        assert model_body == values_body, url
+        print(f'{url:>20}: serializer {model_time:7.2f} ms, '
+              f'values {values_time:7.2f} ms, '
+              f'x{model_time / values_time:.1f}')
+
+
+if __name__ == '__main__':
+    main()
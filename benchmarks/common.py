@@ -0,0 +1,44 @@
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import (setup_test_environment,  # noqa: E402
+                               teardown_test_environment)
+
+
+def setup_database(test_name=None):
+    """
+    Создаёт временную тестовую базу и возвращает функцию её удаления.
+    Для SQLite без ``test_name`` база создаётся в памяти.
+    """
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    if test_name is not None:
+        connection.settings_dict['TEST']['NAME'] = test_name
+    connection.creation.create_test_db(verbosity=0)
+
+    def teardown():
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+    return teardown
+
+
+def timeit(func, repeat=20):
+    """Возвращает лучшее время одного вызова ``func`` в миллисекундах."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
@@ -1,4 +1,8 @@
+from contextlib import contextmanager
+
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
 
@@ -24,6 +28,18 @@ def create_users_api(user_client):
     return user, moderator
 
 
+@contextmanager
+def assert_max_queries(limit, description=''):
+    with CaptureQueriesContext(connection) as context:
+        yield context
+    executed = len(context.captured_queries)
+    queries = '\n'.join(query['sql'] for query in context.captured_queries)
+    assert executed <= limit, (
+        f'{description} выполняет {executed} запросов к базе, '
+        f'допустимо не более {limit}:\n{queries}'
+    )
+
+
 def auth_client(user):
     refresh = RefreshToken.for_user(user)
     client = APIClient()
@@ -1,4 +1,32 @@
+import pytest
+
 pytest_plugins = [
     'tests.fixtures.fixture_user',
     # 'tests.fixtures.fixture_data',
 ]
+
+
+def pytest_configure(config):
+    from django.conf import settings
+
+    # Индексы строятся в тестах по тестовой базе, а не при импорте
+    # api_yamdb.asgi.
+    settings.MEMORY_INDEXES_WARM_UP = False
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    # Между тестами база очищается без сигналов, кэши нужно сбросить вручную.
+    from django.core.cache import cache
+
+    from api.autocomplete import completions
+    from api.facets import title_facets
+    from api.fuzzy import fuzzy_titles
+    from api.slug_cache import category_slugs, genre_slugs
+    yield
+    cache.clear()
+    completions.reset()
+    fuzzy_titles.reset()
+    title_facets.reset()
+    category_slugs.invalidate()
+    genre_slugs.invalidate()
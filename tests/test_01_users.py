@@ -1,7 +1,37 @@
+import threading
+
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from api.checks import check_token_version_cache
+
+from .common import assert_max_queries, auth_client, create_users_api
+
 
-from .common import auth_client, create_users_api
+class ConcurrentSignupBackend(EmailBackend):
+    """Во время отправки другой поток регистрирует пользователя."""
+    statuses = []
+
+    def send_messages(self, messages):
+        def signup():
+            try:
+                response = APIClient().post('/api/v1/auth/email/', data={
+                    'email': 'late@yamdb.fake', 'username': 'late'})
+                self.statuses.append(response.status_code)
+            finally:
+                connection.close()
+
+        if not self.statuses:
+            thread = threading.Thread(target=signup)
+            thread.start()
+            thread.join()
+        return super().send_messages(messages)
 
 
 class Test01UserAPI:
@@ -82,6 +112,26 @@ class Test01UserAPI:
             'Значение параметра `results` не правильное'
         )
 
+    @pytest.mark.django_db(transaction=True)
+    def test_04a_users_search(self, user_client):
+        User = get_user_model()
+        for username in ('alice', 'malice', 'bob'):
+            User.objects.create_user(username=username, email=f'{username}@yamdb.fake')
+
+        def usernames(url):
+            response = user_client.get(url)
+            assert response.status_code == 200, (
+                f'Проверьте, что при GET запросе `{url}` возвращается статус 200'
+            )
+            return sorted(user['username'] for user in response.json()['results'])
+
+        assert usernames('/api/v1/users/?search=lice') == ['alice', 'malice'], (
+            'Проверьте, что `/api/v1/users/?search=` ищет по любой части username'
+        )
+        assert usernames('/api/v1/users/?username=ALI') == ['alice'], (
+            'Проверьте, что `/api/v1/users/?username=` ищет по началу username без учёта регистра'
+        )
+
     @pytest.mark.django_db(transaction=True)
     def test_05_users_post_auth(self, user_client, admin):
         data = {}
@@ -352,3 +402,96 @@ class Test01UserAPI:
         assert test_moderator.first_name == 'NewTest', (
             'Проверьте, что при PATCH запросе `/api/v1/users/me/` изменяете данные'
         )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_12_users_token_claims(self, client, user_client, admin):
+        user, moderator = create_users_api(user_client)
+        data = {'username': moderator.email, 'confirmation_code': moderator._gen_confirm_code()}
+        response = client.post('/api/v1/auth/token/', data=data)
+        assert response.status_code == 200, (
+            'Проверьте, что при POST запросе `/api/v1/auth/token/` с правильным кодом возвращается статус 200'
+        )
+        token_client = APIClient()
+        token_client.credentials(HTTP_AUTHORIZATION=f'Bearer {response.json()["token"]}')
+        response = token_client.options('/api/v1/titles/')
+        assert response.status_code == 200, (
+            'Проверьте, что токен из `/api/v1/auth/token/` принимается'
+        )
+        with assert_max_queries(0, 'Аутентификация по токену с ролью с настройками по умолчанию'):
+            token_client.options('/api/v1/titles/')
+        with override_settings(TOKEN_VERSION_CACHE_SECONDS=0):
+            with assert_max_queries(1, 'Аутентификация по токену с ролью без кэша версий'):
+                token_client.options('/api/v1/titles/')
+        response = token_client.get('/api/v1/users/me/')
+        assert response.json().get('role') == 'moderator', (
+            'Проверьте, что `/api/v1/users/me/` возвращает данные пользователя из токена'
+        )
+
+        user_client.patch(f'/api/v1/users/{moderator.username}/', data={'role': 'user'})
+        response = token_client.get('/api/v1/titles/')
+        assert response.status_code == 401, (
+            'Проверьте, что после изменения роли пользователя его старые токены отзываются'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_12a_token_revocation_without_cache(self, client, user_client):
+        user, moderator = create_users_api(user_client)
+        data = {'username': moderator.email, 'confirmation_code': moderator._gen_confirm_code()}
+        token_client = APIClient()
+        token_client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {client.post("/api/v1/auth/token/", data=data).json()["token"]}')
+        with override_settings(TOKEN_VERSION_CACHE_SECONDS=0):
+            assert token_client.get('/api/v1/titles/').status_code == 200
+            # Версия изменена в обход save() и кэша.
+            get_user_model().objects.filter(pk=moderator.pk).update(token_version=F('token_version') + 1)
+            assert token_client.get('/api/v1/titles/').status_code == 401, (
+                'Проверьте, что без кэша версий отзыв токенов в обход save() действует сразу'
+            )
+        assert check_token_version_cache(None) == [], (
+            'Проверьте, что настройки кэша по умолчанию позволяют кэшировать версии токенов'
+        )
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            assert [error.id for error in check_token_version_cache(None)] == ['api.E001'], (
+                'Проверьте, что кэширование версий токенов требует общего для процессов кэша'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_13_confirmation_email_outbox(self, client, mailoutbox):
+        for number in range(3):
+            data = {'email': f'new{number}@yamdb.fake', 'username': f'new{number}'}
+            response = client.post('/api/v1/auth/email/', data=data)
+            assert response.status_code == 200, (
+                'Проверьте, что при POST запросе `/api/v1/auth/email/` возвращается статус 200'
+            )
+        assert len(mailoutbox) == 0, (
+            'Проверьте, что `/api/v1/auth/email/` не отправляет письмо в обработчике запроса'
+        )
+        call_command('send_outbox', '--once', '--batch-size', '2')
+        assert sorted(message.to[0] for message in mailoutbox) == [
+            'new0@yamdb.fake', 'new1@yamdb.fake', 'new2@yamdb.fake'], (
+            'Проверьте, что `send_outbox` отправляет письма из очереди по адресам пользователей'
+        )
+        call_command('send_outbox', '--once')
+        assert len(mailoutbox) == 3, (
+            'Проверьте, что `send_outbox` не отправляет письма повторно'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_14_email_outbox_concurrent_signup(self, client, mailoutbox):
+        for number in range(3):
+            client.post('/api/v1/auth/email/', data={
+                'email': f'new{number}@yamdb.fake', 'username': f'new{number}'})
+        ConcurrentSignupBackend.statuses = []
+        backend = 'tests.test_01_users.ConcurrentSignupBackend'
+        with override_settings(EMAIL_BACKEND=backend):
+            call_command('send_outbox', '--once')
+        assert ConcurrentSignupBackend.statuses == [200], (
+            'Проверьте, что `send_outbox` не держит транзакцию во время отправки писем '
+            'и не мешает регистрации'
+        )
+        call_command('send_outbox', '--once')
+        assert sorted(message.to[0] for message in mailoutbox) == [
+            'late@yamdb.fake', 'new0@yamdb.fake', 'new1@yamdb.fake', 'new2@yamdb.fake'], (
+            'Проверьте, что `send_outbox` отправляет каждое письмо ровно один раз, '
+            'даже если во время отправки в очередь добавляются новые'
+        )
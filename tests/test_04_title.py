@@ -1,7 +1,13 @@
 import pytest
+from rest_framework.renderers import JSONRenderer
 
-from .common import (auth_client, create_categories, create_genre,
-                     create_titles, create_users_api)
+from api.models import Categories, Titles
+from api.serializers import CategoriesSerializer, TitlesReadSerializer
+from api.views import TitleViews
+
+from .common import (assert_max_queries, auth_client, create_categories,
+                     create_genre, create_reviews, create_titles,
+                     create_users_api)
 
 
 class Test04TitleAPI:
@@ -239,3 +245,118 @@ class Test04TitleAPI:
         user, moderator = create_users_api(user_client)
         self.check_permissions(user, 'обычного пользователя', titles, categories, genres)
         self.check_permissions(moderator, 'модератора', titles, categories, genres)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_titles_cursor_pagination(self, client, user_client):
+        titles, _, _ = create_titles(user_client)
+        response = client.get('/api/v1/titles/?cursor=')
+        assert response.status_code == 200, (
+            'Проверьте, что при GET запросе `/api/v1/titles/?cursor=` возвращается статус 200'
+        )
+        data = response.json()
+        assert set(data) == {'count', 'next', 'previous', 'results'}, (
+            'Проверьте, что курсорная пагинация `/api/v1/titles/` сохраняет формат ответа'
+        )
+        assert [title['id'] for title in data['results']] == [title['id'] for title in titles], (
+            'Проверьте, что курсорная пагинация `/api/v1/titles/` упорядочивает произведения по `id`'
+        )
+        for param in ('search', 'fuzzy'):
+            response = client.get(f'/api/v1/titles/?{param}=Проект&cursor=')
+            assert response.status_code == 400 and 'cursor' in response.json(), (
+                f'Проверьте, что `/api/v1/titles/` отклоняет `cursor` вместе с `{param}`: '
+                'курсор потерял бы порядок по релевантности'
+            )
+            response = client.get(f'/api/v1/titles/?{param}=Проект')
+            assert response.status_code == 200 and response.json()['results'], (
+                f'Проверьте, что `{param}` без `cursor` работает с постраничной пагинацией'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_titles_values_list(self, client, user_client, admin):
+        create_reviews(user_client, admin)
+        Titles.objects.create(name='Без категории')
+        queryset = TitleViews.queryset.all()
+        expected = JSONRenderer().render(TitlesReadSerializer(queryset, many=True).data)
+        response = client.get('/api/v1/titles/')
+        assert JSONRenderer().render(response.data['results']) == expected, (
+            'Проверьте, что список `/api/v1/titles/` совпадает с выводом `TitlesReadSerializer`'
+        )
+        expected = JSONRenderer().render(CategoriesSerializer(Categories.objects.all(), many=True).data)
+        response = client.get('/api/v1/categories/')
+        assert JSONRenderer().render(response.data['results']) == expected, (
+            'Проверьте, что список `/api/v1/categories/` совпадает с выводом `CategoriesSerializer`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_07_titles_batch(self, client, user_client, admin):
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        first, second = titles[0]['id'], titles[1]['id']
+        url = f'/api/v1/titles/batch/?ids={second},999999,{first},{second}'
+        with assert_max_queries(2, f'GET запрос `{url}`'):
+            response = client.get(url)
+        assert response.status_code == 200, (
+            f'Проверьте, что при GET запросе `{url}` возвращается статус 200'
+        )
+        expected = [client.get(f'/api/v1/titles/{pk}/').json() for pk in (second, first)]
+        assert response.json() == expected, (
+            'Проверьте, что `/api/v1/titles/batch/` возвращает произведения в порядке запроса '
+            'без повторов и несуществующих `id`'
+        )
+
+        response = client.post('/api/v1/titles/batch/', data={'ids': [first, second]}, content_type='application/json')
+        assert response.status_code == 200 and [title['id'] for title in response.json()] == [first, second], (
+            'Проверьте, что POST запрос `/api/v1/titles/batch/` со списком `ids` доступен без токена'
+        )
+        response = client.get(f'/api/v1/titles/batch/?ids={second},{first}&fields=name')
+        assert response.json() == [{'name': titles[1]['name']}, {'name': titles[0]['name']}], (
+            'Проверьте, что `/api/v1/titles/batch/` поддерживает `?fields=`'
+        )
+        for url in ('/api/v1/titles/batch/', '/api/v1/titles/batch/?ids=1,abc'):
+            response = client.get(url)
+            assert response.status_code == 400, (
+                f'Проверьте, что GET запрос `{url}` возвращает статус 400'
+            )
+        response = client.post('/api/v1/titles/batch/', data={'ids': list(range(1, 202))}, content_type='application/json')
+        assert response.status_code == 400, (
+            'Проверьте, что `/api/v1/titles/batch/` ограничивает количество `ids`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_08_titles_full_text_search(self, client, user_client):
+        titles, _, _ = create_titles(user_client)
+        extra = Titles.objects.create(name='Зелёная миля', description='Поворот судьбы')
+        response = client.get('/api/v1/titles/?search=поворот')
+        assert response.status_code == 200, (
+            'Проверьте, что при GET запросе `/api/v1/titles/?search=` возвращается статус 200'
+        )
+        assert [title['id'] for title in response.json()['results']] == [titles[0]['id'], extra.pk], (
+            'Проверьте, что `?search=` ищет по названию и описанию и ставит совпадения в названии выше'
+        )
+        response = client.get('/api/v1/titles/?search=драма год')
+        assert [title['id'] for title in response.json()['results']] == [titles[1]['id']], (
+            'Проверьте, что `?search=` находит произведения, содержащие все слова запроса'
+        )
+        response = client.get('/api/v1/titles/?name=зелен')
+        assert [title['id'] for title in response.json()['results']] == [extra.pk], (
+            'Проверьте, что `?name=` находит название по началу слова без учёта `ё`'
+        )
+        response = client.get('/api/v1/titles/?name=поворот')
+        assert [title['id'] for title in response.json()['results']] == [titles[0]['id']], (
+            'Проверьте, что `?name=` не ищет по описанию'
+        )
+
+        extra.name = 'Побег'
+        extra.save()
+        response = client.get('/api/v1/titles/?name=побег')
+        assert [title['id'] for title in response.json()['results']] == [extra.pk], (
+            'Проверьте, что полнотекстовый индекс обновляется при изменении произведения'
+        )
+        extra.delete()
+        response = client.get('/api/v1/titles/?search=побег')
+        assert response.json()['count'] == 0, (
+            'Проверьте, что удалённое произведение пропадает из поиска'
+        )
+        response = client.get('/api/v1/titles/?search="*(')
+        assert response.status_code == 200 and response.json()['count'] == 0, (
+            'Проверьте, что `?search=` без слов не приводит к ошибке'
+        )
@@ -1,7 +1,10 @@
 import pytest
+from django.core.management import CommandError, call_command
 
-from .common import (auth_client, create_reviews, create_titles,
-                     create_users_api)
+from api.models import Review, Titles
+
+from .common import (assert_max_queries, auth_client, create_reviews,
+                     create_titles, create_users_api)
 
 
 class Test05ReviewAPI:
@@ -289,3 +292,114 @@ class Test05ReviewAPI:
             'без токена авторизации возвращается статус 401'
         )
         self.check_permissions(user, 'обычного пользователя', reviews, titles)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_review_rating_aggregates(self, user_client, admin):
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        title = Titles.objects.get(pk=titles[0]['id'])
+        assert (title.score_sum, title.review_count) == (12, 3), (
+            'Проверьте, что при создании отзыва обновляются сумма оценок и число отзывов произведения'
+        )
+        user_client.delete(f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/')
+        title.refresh_from_db()
+        assert (title.score_sum, title.review_count) == (7, 2), (
+            'Проверьте, что при удалении отзыва обновляются сумма оценок и число отзывов произведения'
+        )
+        call_command('rebuild_ratings', '--check')
+
+        Titles.objects.filter(pk=title.pk).update(score_sum=0, review_count=0)
+        with pytest.raises(CommandError):
+            call_command('rebuild_ratings', '--check')
+        title.refresh_from_db()
+        versions = (title.version, title.reviews_version)
+        with assert_max_queries(1, 'Команда `rebuild_ratings`: чтение агрегатов и запись одним UPDATE'):
+            call_command('rebuild_ratings')
+        title.refresh_from_db()
+        assert (title.score_sum, title.review_count) == (7, 2), (
+            'Проверьте, что команда `rebuild_ratings` пересчитывает агрегаты рейтинга'
+        )
+        assert (title.version, title.reviews_version) == (versions[0] + 1, versions[1] + 1), (
+            'Проверьте, что команда `rebuild_ratings` меняет версии пересчитанных произведений для ETag'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_rating_cascade_delete(self, client, user_client, admin):
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        title = Titles.objects.get(pk=titles[0]['id'])
+        etag = client.get(f'/api/v1/titles/{title.pk}/')['ETag']
+        user_client.delete(f'/api/v1/users/{user.username}/')
+        response = client.get(f'/api/v1/titles/{title.pk}/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что удаление пользователя с отзывами меняет ETag произведения'
+        )
+        title.refresh_from_db()
+        assert (title.score_sum, title.review_count) == (9, 2), (
+            'Проверьте, что удаление пользователя вместе с его отзывами обновляет рейтинг произведения'
+        )
+        response = client.get(f'/api/v1/titles/{title.pk}/reviews/')
+        assert response.json()['count'] == len(response.json()['results']) == 2, (
+            'Проверьте, что после удаления пользователя число отзывов в списке совпадает с выдачей'
+        )
+
+        call_command('rebuild_ratings', '--check')
+        user_client.delete(f'/api/v1/titles/{title.pk}/')
+        assert not Review.objects.exists(), (
+            'Проверьте, что произведение удаляется вместе с отзывами'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_07_stale_title_save(self, client, user_client, admin):
+        titles, _, _ = create_titles(user_client)
+        stale = Titles.objects.get(pk=titles[0]['id'])
+        etag = client.get(f'/api/v1/titles/{stale.pk}/')['ETag']
+        user_client.post(f'/api/v1/titles/{stale.pk}/reviews/', data={'text': 'Отзыв', 'score': 8})
+        stale.name = 'Поворот обратно'
+        stale.save()
+        title = Titles.objects.get(pk=stale.pk)
+        assert (title.name, title.score_sum, title.review_count) == ('Поворот обратно', 8, 1), (
+            'Проверьте, что сохранение произведения, загруженного до отзыва, не сбрасывает его рейтинг'
+        )
+        assert (stale.score_sum, stale.review_count, stale.version) == (8, 1, title.version), (
+            'Проверьте, что после сохранения у произведения актуальные счётчики'
+        )
+        response = client.get(f'/api/v1/titles/{stale.pk}/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что сохранение произведения не возвращает назад его версию для ETag'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_08_admin_review_rating(self, client, user_client, admin):
+        titles, _, _ = create_titles(user_client)
+        title = Titles.objects.get(pk=titles[0]['id'])
+        client.force_login(admin)
+        data = {'title': title.pk, 'text': 'Из админки', 'author': admin.pk, 'score': 6}
+        response = client.post('/admin/api/review/add/', data=data)
+        assert response.status_code == 302, (
+            'Проверьте, что отзыв создаётся из админки'
+        )
+        title.refresh_from_db()
+        assert (title.score_sum, title.review_count) == (6, 1), (
+            'Проверьте, что отзыв, созданный из админки, меняет рейтинг произведения'
+        )
+        review = Review.objects.get()
+        client.post(f'/admin/api/review/{review.pk}/change/', data=dict(data, score=9))
+        title.refresh_from_db()
+        assert (title.score_sum, title.review_count) == (9, 1), (
+            'Проверьте, что изменение оценки из админки меняет рейтинг произведения'
+        )
+        other = Titles.objects.get(pk=titles[1]['id'])
+        client.post(f'/admin/api/review/{review.pk}/change/', data=dict(data, title=other.pk, score=9))
+        title.refresh_from_db()
+        other.refresh_from_db()
+        assert (title.score_sum, title.review_count, other.score_sum, other.review_count) == (0, 0, 9, 1), (
+            'Проверьте, что перенос отзыва к другому произведению из админки переносит оценку'
+        )
+        call_command('rebuild_ratings', '--check')
+        response = user_client.delete(f'/api/v1/users/{admin.username}/')
+        assert response.status_code == 204, (
+            'Проверьте, что автора отзыва из админки можно удалить'
+        )
+        other.refresh_from_db()
+        assert (other.score_sum, other.review_count) == (0, 0), (
+            'Проверьте, что удаление отзыва из админки вместе с автором обновляет рейтинг'
+        )
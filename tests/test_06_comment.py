@@ -246,3 +246,24 @@ class Test06CommentAPI:
             'без токена авторизации возвращается статус 401'
         )
         self.check_permissions(user, 'обычного пользователя', f'{pre_url}{comments[2]["id"]}/')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_comment_wrong_title(self, client, user_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(user_client, admin)
+        url = f'/api/v1/titles/{titles[1]["id"]}/reviews/{reviews[0]["id"]}/comments/'
+        response = client.get(url)
+        assert response.status_code == 404, (
+            'Проверьте, что комментарии не отдаются по адресу произведения, к которому отзыв не относится'
+        )
+        response = client.get(f'{url}{comments[0]["id"]}/')
+        assert response.status_code == 404, (
+            'Проверьте, что комментарий не отдаётся по адресу произведения, к которому отзыв не относится'
+        )
+        response = user_client.post(url, data={'text': 'Новый комментарий'})
+        assert response.status_code == 404, (
+            'Проверьте, что нельзя создать комментарий по адресу произведения, к которому отзыв не относится'
+        )
+        response = client.get(f'/api/v1/titles/{titles[1]["id"]}/reviews/')
+        assert response.status_code == 200 and response.json()['results'] == [], (
+            'Проверьте, что для произведения без отзывов возвращается пустой список'
+        )
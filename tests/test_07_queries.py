@@ -0,0 +1,71 @@
+import pytest
+
+from api.models import Comment, Review, Titles
+
+from .common import (assert_max_queries, create_categories, create_comments,
+                     create_genre)
+
+
+class Test07QueryBudget:
+
+    def fill(self, user_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(user_client, admin)
+        title = Titles.objects.get(pk=titles[0]['id'])
+        review = Review.objects.get(pk=reviews[0]['id'])
+        for number in range(20):
+            extra = Titles.objects.create(name=f'Произведение {number}',
+                                          category=title.category)
+            extra.genre.set(title.genre.all())
+            Comment.objects.create(review=review, author=admin, text=f'Комментарий {number}')
+        for number in range(20):
+            author = type(admin).objects.create(username=f'reader{number}',
+                                                email=f'reader{number}@yamdb.fake')
+            Review.objects.create(title=title, author=author, text='Текст', score=5)
+        return title, review
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_list_query_budget(self, client, user_client, admin):
+        title, review = self.fill(user_client, admin)
+        urls = [
+            ('/api/v1/categories/', 2),
+            ('/api/v1/genres/', 2),
+            ('/api/v1/titles/', 3),
+            (f'/api/v1/titles/{title.pk}/', 2),
+            (f'/api/v1/titles/{title.pk}/reviews/', 2),
+            (f'/api/v1/titles/{title.pk}/reviews/{review.pk}/', 1),
+            (f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/', 2),
+        ]
+        for url, limit in urls:
+            with assert_max_queries(limit, f'GET запрос `{url}`'):
+                response = client.get(url)
+            assert response.status_code == 200, (
+                f'Проверьте, что при GET запросе `{url}` возвращается статус 200'
+            )
+        with assert_max_queries(3, 'GET запрос `/api/v1/users/`'):
+            response = user_client.get('/api/v1/users/')
+        assert response.status_code == 200, (
+            'Проверьте, что при GET запросе `/api/v1/users/` возвращается статус 200'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_title_create_query_budget(self, user_client):
+        genres = create_genre(user_client)
+        categories = create_categories(user_client)
+        data = {'name': 'Поворот туда', 'year': 2000, 'genre': [genre['slug'] for genre in genres],
+                'category': categories[0]['slug']}
+        with assert_max_queries(8, 'POST запрос `/api/v1/titles/` с холодным кэшем slug'):
+            response = user_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == 201, (
+            'Проверьте, что при POST запросе `/api/v1/titles/` с правильными данными возвращает статус 201'
+        )
+        with assert_max_queries(6, 'POST запрос `/api/v1/titles/` с прогретым кэшем slug'):
+            response = user_client.post('/api/v1/titles/', data=data)
+        assert response.json()['category'] == categories[0], (
+            'Проверьте, что при POST запросе `/api/v1/titles/` возвращается категория произведения'
+        )
+
+        user_client.delete(f'/api/v1/categories/{categories[0]["slug"]}/')
+        response = user_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == 400, (
+            'Проверьте, что после удаления категории её `slug` нельзя указать у произведения'
+        )
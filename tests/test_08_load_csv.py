@@ -0,0 +1,80 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from api.models import Categories, Comment, CustomUser, Review, Titles
+
+
+class Test08LoadCsv:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_load_csv(self, client):
+        call_command('load_csv', '--batch-size', '7')
+        assert Titles.objects.count() == 32, (
+            'Проверьте, что команда `load_csv` загружает все произведения'
+        )
+        assert Titles.genre.through.objects.count() == 42, (
+            'Проверьте, что команда `load_csv` загружает связи произведений и жанров'
+        )
+        assert Review.objects.count() == 73, (
+            'Проверьте, что команда `load_csv` пропускает повторные отзывы автора на произведение'
+        )
+        assert Comment.objects.get(pk=1).pub_date.year == 2020, (
+            'Проверьте, что команда `load_csv` сохраняет даты публикации из файла'
+        )
+        response = client.get('/api/v1/titles/1/')
+        assert response.json()['rating'] == 10, (
+            'Проверьте, что после `load_csv` пересчитан рейтинг произведений'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_load_csv_update(self, client):
+        Categories.objects.create(name='Старое название', slug='movie')
+        Categories.objects.create(name='Другая категория', slug='other')
+        call_command('load_csv', '--update')
+        assert Categories.objects.get(slug='movie').name == 'Фильм', (
+            'Проверьте, что `load_csv --update` обновляет изменившиеся категории по `slug`'
+        )
+        book = Categories.objects.get(slug='book')
+        assert Titles.objects.filter(category=book).exists(), (
+            'Проверьте, что `load_csv --update` связывает произведения с категориями по `slug`'
+        )
+
+        Titles.objects.filter(pk=1).update(name='Изменено')
+        etag = client.get('/api/v1/titles/1/')['ETag']
+        stdout = StringIO()
+        call_command('load_csv', '--update', stdout=stdout)
+        assert Titles.objects.get(pk=1).name == 'Побег из Шоушенка', (
+            'Проверьте, что `load_csv --update` возвращает значения из файла'
+        )
+        assert 'titles.csv: 0 inserted, 1 updated' in stdout.getvalue(), (
+            'Проверьте, что `load_csv --update` перезаписывает только изменившиеся строки'
+        )
+        assert Review.objects.count() == 73, (
+            'Проверьте, что `load_csv --update` не дублирует отзывы'
+        )
+        response = client.get('/api/v1/titles/1/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что `load_csv --update` меняет версию изменённых произведений для ETag'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_load_csv_revokes_tokens(self, client):
+        call_command('load_csv')
+        user = CustomUser.objects.get(pk=100)
+        user.role = 'admin'
+        user.save()
+        data = {'username': user.email, 'confirmation_code': user._gen_confirm_code()}
+        token_client = APIClient()
+        token_client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {client.post("/api/v1/auth/token/", data=data).json()["token"]}')
+        assert token_client.get('/api/v1/users/').status_code == 200
+        call_command('load_csv', '--update', stdout=StringIO())
+        assert CustomUser.objects.get(pk=100).role == 'user', (
+            'Проверьте, что `load_csv --update` возвращает роль пользователя из файла'
+        )
+        assert token_client.get('/api/v1/users/').status_code == 401, (
+            'Проверьте, что `load_csv --update` отзывает токены пользователей с изменённой ролью'
+        )
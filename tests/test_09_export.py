@@ -0,0 +1,67 @@
+import csv
+import io
+import json
+
+import pytest
+
+from api.models import Titles
+
+from .common import auth_client, create_reviews
+
+
+class Test09ExportAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_export(self, client, user_client, admin):
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        response = client.get('/api/v1/titles/export/')
+        assert response.status_code == 401, (
+            'Проверьте, что при GET запросе `/api/v1/titles/export/` без токена возвращается статус 401'
+        )
+        response = auth_client(user).get('/api/v1/titles/export/')
+        assert response.status_code == 403, (
+            'Проверьте, что `/api/v1/titles/export/` доступен только администратору'
+        )
+
+        response = user_client.get('/api/v1/titles/export/')
+        assert response.status_code == 200, (
+            'Проверьте, что при GET запросе `/api/v1/titles/export/` администратором возвращается статус 200'
+        )
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        exported = [json.loads(line) for line in lines]
+        assert [title['id'] for title in exported] == [title['id'] for title in titles], (
+            'Проверьте, что `/api/v1/titles/export/` выгружает все произведения по порядку `id`'
+        )
+        assert exported[0]['genre'] == sorted(titles[0]['genre']), (
+            'Проверьте, что `/api/v1/titles/export/` выгружает `slug` жанров'
+        )
+        assert exported[0]['category'] == titles[0]['category'], (
+            'Проверьте, что `/api/v1/titles/export/` выгружает `slug` категории'
+        )
+        assert exported[0]['rating'] == 4, (
+            'Проверьте, что `/api/v1/titles/export/` выгружает рейтинг'
+        )
+
+        response = user_client.get(f'/api/v1/titles/export/?type=csv&after={titles[0]["id"]}')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        assert lines[0] == 'id,name,year,category,genre,rating,description', (
+            'Проверьте, что `/api/v1/titles/export/?type=csv` начинается с заголовка'
+        )
+        assert len(lines) == 2 and lines[1].startswith(f'{titles[1]["id"]},'), (
+            'Проверьте, что `/api/v1/titles/export/?after=` продолжает выгрузку после указанного `id`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_export_csv_chunks(self, user_client):
+        Titles.objects.bulk_create(
+            Titles(name=f'Произведение {number}', year=2000, description='Описание, ' * 20)
+            for number in range(500))
+        response = user_client.get('/api/v1/titles/export/?type=csv')
+        chunks = list(response.streaming_content)
+        assert len(chunks) > 1, (
+            'Проверьте, что `/api/v1/titles/export/?type=csv` отдаёт выгрузку по частям'
+        )
+        rows = list(csv.DictReader(io.StringIO(b''.join(chunks).decode())))
+        assert [row['name'] for row in rows] == [f'Произведение {number}' for number in range(500)], (
+            'Проверьте, что `/api/v1/titles/export/?type=csv` выгружает каждое произведение ровно один раз'
+        )
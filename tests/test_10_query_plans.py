@@ -0,0 +1,68 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_comments
+
+pytestmark = pytest.mark.skipif(connection.vendor != 'sqlite',
+                                reason='Планы запросов проверяются для SQLite')
+
+
+def query_plan(client, url, table):
+    """План основного запроса страницы: SELECT с LIMIT из таблицы `table`."""
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200, (
+        f'Проверьте, что при GET запросе `{url}` возвращается статус 200'
+    )
+    queries = [query['sql'] for query in context.captured_queries
+               if f'FROM "{table}"' in query['sql'] and 'LIMIT' in query['sql']
+               and 'COUNT(*)' not in query['sql']]
+    assert queries, f'Не найден основной запрос `{url}` к таблице `{table}`'
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {queries[-1]}')
+        return ' | '.join(row[-1] for row in cursor.fetchall())
+
+
+class Test10QueryPlans:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_query_plans(self, client, user_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(user_client, admin)
+        title_id, review_id = titles[0]['id'], reviews[0]['id']
+        cases = [
+            (client, '/api/v1/titles/?year=2000', 'api_titles', 'titles_year_idx'),
+            (client, '/api/v1/titles/?category=films', 'api_titles', 'titles_category_idx'),
+            (client, f'/api/v1/titles/{title_id}/reviews/', 'api_review',
+             'review_title_pub_date_idx'),
+            (client, f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/', 'api_comment',
+             'comment_review_pub_date_idx'),
+            (user_client, '/api/v1/users/?username=Test', 'api_customuser',
+             'customuser_username_nocase_idx'),
+        ]
+        for api_client, url, table, index in cases:
+            plan = query_plan(api_client, url, table)
+            assert f'USING INDEX {index}' in plan or f'USING COVERING INDEX {index}' in plan, (
+                f'Проверьте, что основной запрос `{url}` использует индекс `{index}`. План: {plan}'
+            )
+            assert f'SCAN {table}' not in plan, (
+                f'Проверьте, что основной запрос `{url}` не просматривает всю таблицу `{table}`. План: {plan}'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_full_text_search_plans(self, client, user_client, admin):
+        create_comments(user_client, admin)
+        cases = [
+            ('/api/v1/titles/?name=Поворот', 'api_titles', 'titles_fts'),
+            ('/api/v1/titles/?search=пике', 'api_titles', 'titles_fts'),
+            ('/api/v1/search/reviews/?q=qwerty', 'api_review', 'reviews_fts'),
+            ('/api/v1/search/comments/?q=qwerty', 'api_comment', 'comments_fts'),
+        ]
+        for url, table, fts_table in cases:
+            plan = query_plan(client, url, table)
+            assert f'{fts_table} VIRTUAL TABLE INDEX' in plan, (
+                f'Проверьте, что `{url}` ищет по полнотекстовому индексу `{fts_table}`. План: {plan}'
+            )
+            assert f'SCAN {table}' not in plan, (
+                f'Проверьте, что `{url}` не просматривает всю таблицу `{table}`. План: {plan}'
+            )
@@ -0,0 +1,113 @@
+import os
+import sqlite3
+from contextlib import closing
+
+import pytest
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from api.management.commands.refresh_replicas import copy_database
+from api.middleware import ReplicaRoutingMiddleware
+from api.models import CustomUser, Titles
+from api.routers import ReplicaRouter
+
+
+def sqlite_pragmas(path, alias):
+    """Открывает соединение Django с файлом `path` и читает его настройки."""
+    wrapper = DatabaseWrapper(dict(connection.settings_dict, NAME=path), alias)
+    try:
+        with wrapper.cursor() as cursor:
+            return {name: cursor.execute(f'PRAGMA {name}').fetchone()[0]
+                    for name in ('journal_mode', 'synchronous', 'busy_timeout')}
+    finally:
+        wrapper.close()
+
+
+def routed_alias(method, status=200, model=Titles, **headers):
+    aliases = []
+
+    def get_response(request):
+        aliases.append(ReplicaRouter().db_for_read(model))
+        return HttpResponse(status=status)
+
+    request = getattr(RequestFactory(), method)('/api/v1/titles/', **headers)
+    ReplicaRoutingMiddleware(get_response)(request)
+    return aliases[0]
+
+
+class Test11ReplicaRouting:
+
+    @override_settings(DATABASE_REPLICAS=['replica'])
+    def test_01_replica_routing(self):
+        assert routed_alias('get') == 'replica', (
+            'Проверьте, что чтения в GET запросах направляются на реплику'
+        )
+        assert routed_alias('post') == 'default', (
+            'Проверьте, что чтения в изменяющих запросах направляются в основную базу'
+        )
+        assert routed_alias('get', model=CustomUser) == 'default', (
+            'Проверьте, что пользователи (роль и версия токенов) всегда читаются из основной базы'
+        )
+        assert ReplicaRouter().db_for_read(Titles) == 'default', (
+            'Проверьте, что вне запроса чтения направляются в основную базу'
+        )
+        assert ReplicaRouter().db_for_write(Titles) == 'default', (
+            'Проверьте, что запись всегда направляется в основную базу'
+        )
+
+    @override_settings(DATABASE_REPLICAS=['replica'])
+    def test_02_read_your_writes(self):
+        writer = {'HTTP_AUTHORIZATION': 'Bearer writer'}
+        other = {'HTTP_AUTHORIZATION': 'Bearer other'}
+        routed_alias('post', status=400, **writer)
+        assert routed_alias('get', **writer) == 'replica', (
+            'Проверьте, что неуспешный изменяющий запрос не закрепляет клиента за основной базой'
+        )
+        routed_alias('post', status=201, **writer)
+        assert routed_alias('get', **writer) == 'default', (
+            'Проверьте, что после записи клиент читает из основной базы'
+        )
+        assert routed_alias('get', **other) == 'replica', (
+            'Проверьте, что другие клиенты продолжают читать с реплики'
+        )
+
+    def test_03_no_replicas(self):
+        assert routed_alias('get') == 'default', (
+            'Проверьте, что без реплик чтения направляются в основную базу'
+        )
+
+    def test_04_refresh_open_replica(self, tmp_path):
+        source, target = str(tmp_path / 'source.sqlite3'), str(tmp_path / 'replica.sqlite3')
+        with closing(sqlite3.connect(source)) as db:
+            db.execute('PRAGMA journal_mode = WAL')
+            db.execute('CREATE TABLE item (id INTEGER PRIMARY KEY)')
+            db.execute('INSERT INTO item VALUES (1)')
+            db.commit()
+            copy_database(source, target)
+            inode = os.stat(target).st_ino
+            with closing(sqlite3.connect(target)) as reader:
+                assert reader.execute('SELECT count(*) FROM item').fetchone() == (1, )
+                db.execute('INSERT INTO item VALUES (2)')
+                db.commit()
+                copy_database(source, target)
+                assert reader.execute('SELECT count(*) FROM item').fetchone() == (2, ), (
+                    'Проверьте, что открытые соединения с репликой видят данные после `refresh_replicas`'
+                )
+        assert os.stat(target).st_ino == inode, (
+            'Проверьте, что `refresh_replicas` обновляет файл реплики на месте, а не подменяет его'
+        )
+
+    @pytest.mark.skipif(connection.vendor != 'sqlite', reason='Настройки соединения есть только у SQLite')
+    @pytest.mark.django_db
+    @override_settings(DATABASE_REPLICAS=['replica1'])
+    def test_05_sqlite_pragmas(self, tmp_path):
+        pragmas = sqlite_pragmas(str(tmp_path / 'default.sqlite3'), 'default')
+        assert pragmas == {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 20000}, (
+            f'Проверьте, что к новым соединениям применяются `SQLITE_PRAGMAS`: {pragmas}'
+        )
+        pragmas = sqlite_pragmas(str(tmp_path / 'replica.sqlite3'), 'replica1')
+        assert pragmas['journal_mode'] == 'delete' and pragmas['synchronous'] == 2, (
+            f'Проверьте, что `SQLITE_PRAGMAS` не применяются к соединениям с репликами: {pragmas}'
+        )
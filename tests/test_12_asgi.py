@@ -0,0 +1,140 @@
+import asyncio
+import csv
+import io
+
+import pytest
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.conf import settings
+from django.test import AsyncClient, override_settings
+
+from api_yamdb.asgi import AsyncReadsHandler, application
+
+from .common import create_comments, create_titles
+
+
+ASGI_URLS = override_settings(ROOT_URLCONF='api_yamdb.asgi_urls')
+
+
+class Test12AsyncReads:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_async_reads_match_sync(self, client, user_client, admin, token):
+        comments, reviews, titles, user, moderator = create_comments(user_client, admin)
+        title_id, review_id = titles[0]['id'], reviews[0]['id']
+        urls = [
+            '/api/v1/categories/',
+            '/api/v1/genres/',
+            '/api/v1/titles/',
+            f'/api/v1/titles/{title_id}/',
+            f'/api/v1/titles/{title_id}/reviews/',
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/',
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/',
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/{comments[0]["id"]}/',
+        ]
+        async_client = AsyncClient()
+        for url in urls:
+            expected = client.get(url)
+            with ASGI_URLS:
+                response = async_to_sync(async_client.get)(url)
+            assert response.status_code == expected.status_code == 200, (
+                f'Проверьте, что асинхронный `{url}` возвращает статус 200'
+            )
+            assert response.content == expected.content, (
+                f'Проверьте, что асинхронный `{url}` отвечает так же, как синхронный'
+            )
+
+        with ASGI_URLS:
+            response = async_to_sync(async_client.get)('/api/v1/titles/0/')
+        assert response.status_code == 404, (
+            'Проверьте, что асинхронный запрос несуществующего произведения возвращает статус 404'
+        )
+        with ASGI_URLS:
+            response = async_to_sync(async_client.get)('/api/v1/titles/export/')
+        assert response.status_code == 401, (
+            'Проверьте, что пути без асинхронной версии обслуживаются синхронными представлениями'
+        )
+
+    @ASGI_URLS
+    @pytest.mark.django_db(transaction=True)
+    def test_02_async_writes(self, client, token):
+        async_client = AsyncClient()
+        # AsyncClient передаёт дополнительные аргументы как заголовки ASGI.
+        headers = {'authorization': f'Bearer {token["access"]}'}
+        response = async_to_sync(async_client.post)(
+            '/api/v1/genres/', {'name': 'Драма', 'slug': 'drama'},
+            content_type='application/json', **headers
+        )
+        assert response.status_code == 201, (
+            'Проверьте, что через ASGI администратор может создать жанр'
+        )
+        response = async_to_sync(async_client.post)(
+            '/api/v1/genres/', {'name': 'Комедия', 'slug': 'comedy'},
+            content_type='application/json'
+        )
+        assert response.status_code == 401, (
+            'Проверьте, что через ASGI создание жанра без токена запрещено'
+        )
+        assert client.get('/api/v1/genres/').json()['count'] == 1, (
+            'Проверьте, что жанр, созданный через ASGI, виден в списке'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_asgi_application(self, client, user_client, monkeypatch):
+        user_client.post('/api/v1/genres/', data={'name': 'Драма', 'slug': 'drama'})
+        matches = []
+        resolve_request = AsyncReadsHandler.resolve_request
+
+        def record(handler, request):
+            match = resolve_request(handler, request)
+            matches.append(match)
+            return match
+
+        monkeypatch.setattr(AsyncReadsHandler, 'resolve_request', record)
+        scope = {'type': 'http', 'method': 'GET', 'path': '/api/v1/genres/',
+                 'query_string': b'', 'headers': []}
+
+        async def get():
+            communicator = ApplicationCommunicator(application, scope)
+            await communicator.send_input({'type': 'http.request'})
+            start = await communicator.receive_output(5)
+            body = await communicator.receive_output(5)
+            await communicator.wait()
+            return start['status'], body['body']
+
+        status, body = async_to_sync(get)()
+        assert status == 200 and body == client.get('/api/v1/genres/').content, (
+            'Проверьте, что `api_yamdb.asgi.application` отвечает так же, как синхронный список жанров'
+        )
+        assert asyncio.iscoroutinefunction(matches[0].func), (
+            'Проверьте, что `api_yamdb.asgi.application` разрешает пути по `api_yamdb.asgi_urls`'
+        )
+        assert settings.ROOT_URLCONF == 'api_yamdb.urls', (
+            'Проверьте, что ASGI-вход не меняет `ROOT_URLCONF` процесса'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_asgi_streaming_export(self, user_client, token):
+        titles, _, _ = create_titles(user_client)
+        headers = [(b'authorization', f'Bearer {token["access"]}'.encode())]
+        scope = {'type': 'http', 'method': 'GET', 'path': '/api/v1/titles/export/',
+                 'query_string': b'type=csv', 'headers': headers}
+
+        async def get():
+            communicator = ApplicationCommunicator(application, scope)
+            await communicator.send_input({'type': 'http.request'})
+            start = await communicator.receive_output(5)
+            body = b''
+            while True:
+                message = await communicator.receive_output(5)
+                body += message.get('body', b'')
+                if not message.get('more_body'):
+                    break
+            await communicator.wait()
+            return start['status'], body
+
+        status, body = async_to_sync(get)()
+        rows = list(csv.DictReader(io.StringIO(body.decode())))
+        assert status == 200 and [row['name'] for row in rows] == [title['name'] for title in titles], (
+            'Проверьте, что `/api/v1/titles/export/` через `api_yamdb.asgi.application` отдаёт все произведения'
+        )
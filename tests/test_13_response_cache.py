@@ -0,0 +1,116 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+from django.test import override_settings
+
+from api.response_cache import ListCache, genre_lists
+from api.models import Genres
+from api.slug_cache import SlugCache, genre_slugs
+
+from .common import assert_max_queries, create_titles
+
+FILE_CACHE = 'django.core.cache.backends.filebased.FileBasedCache'
+
+
+class Test13ResponseCache:
+
+    def check_cache(self, client, user_client, url):
+        user_client.post(url, data={'name': 'Первая', 'slug': 'first'})
+        expected = client.get(url)
+        with assert_max_queries(0, f'Повторный GET `{url}` без токена'):
+            response = client.get(url)
+        assert response.status_code == 200 and response.content == expected.content, (
+            f'Проверьте, что закэшированный ответ `{url}` совпадает с исходным'
+        )
+        assert dict(response.items()) == dict(expected.items()), (
+            f'Проверьте, что закэшированный ответ `{url}` отдаётся с исходными заголовками'
+        )
+        response = client.get(f'{url}?search=Вто')
+        assert response.json()['count'] == 0, (
+            f'Проверьте, что `{url}` кэшируется отдельно для каждого значения `search`'
+        )
+
+        user_client.post(url, data={'name': 'Вторая', 'slug': 'second'})
+        assert client.get(url).json()['count'] == 2, (
+            f'Проверьте, что после создания объекта кэш `{url}` сбрасывается'
+        )
+        assert client.get(f'{url}?search=Вто').json()['count'] == 1, (
+            f'Проверьте, что после создания объекта сбрасывается кэш `{url}` со всеми параметрами'
+        )
+        user_client.delete(f'{url}first/')
+        assert client.get(url).json()['count'] == 1, (
+            f'Проверьте, что после удаления объекта кэш `{url}` сбрасывается'
+        )
+        response = user_client.get(url)
+        assert response.json()['count'] == 1, (
+            f'Проверьте, что `{url}` для авторизованного пользователя отдаёт актуальные данные'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_locmem_cache(self, client, user_client):
+        for url in ('/api/v1/categories/', '/api/v1/genres/'):
+            self.check_cache(client, user_client, url)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_file_cache(self, client, user_client, tmp_path):
+        caches = {'default': {'BACKEND': FILE_CACHE, 'LOCATION': str(tmp_path)}}
+        with override_settings(CACHES=caches):
+            for url in ('/api/v1/categories/', '/api/v1/genres/'):
+                self.check_cache(client, user_client, url)
+            assert any(tmp_path.iterdir()), (
+                'Проверьте, что ответы сохраняются в файловом кэше'
+            )
+            cache.clear()
+
+    def test_03_cached_headers(self):
+        list_cache = ListCache('test')
+        original = HttpResponse(b'[]', content_type='application/json')
+        original['ETag'] = '"1-abc"'
+        original['Link'] = '</api/v1/genres/?page=2>; rel="next"'
+        original['Vary'] = 'Accept'
+        list_cache.set('test-key', original)
+        response = list_cache.get('test-key')
+        assert response.content == b'[]' and dict(response.items()) == dict(original.items()), (
+            'Проверьте, что кэш ответов сохраняет и восстанавливает заголовки ответа'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_invalidate_after_commit(self, user_client, monkeypatch):
+        calls = []
+
+        def record(name):
+            def invalidate(*args):
+                calls.append((name, connection.in_atomic_block))
+            return invalidate
+
+        monkeypatch.setattr(genre_lists, 'invalidate', record('list'))
+        monkeypatch.setattr(genre_slugs, 'invalidate', record('slug'))
+        user_client.post('/api/v1/genres/', data={'name': 'Первый', 'slug': 'first'})
+        user_client.delete('/api/v1/genres/first/')
+        assert sorted(calls) == [('list', False), ('list', False), ('slug', False), ('slug', False)], (
+            'Проверьте, что кэши жанров сбрасываются после фиксации транзакции создания и удаления'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_stale_slug(self, user_client):
+        titles, _, _ = create_titles(user_client)
+        data = {'name': 'Новое', 'year': 2001, 'genre': ['horror'], 'category': 'films'}
+        # Жанр удалён через ORM, минуя представление.
+        Genres.objects.filter(slug='horror').delete()
+        response = user_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == 400, (
+            'Проверьте, что удалённый через ORM жанр не проходит проверку при создании произведения'
+        )
+        # Другой процесс удалил жанр и сбросил свою копию кэша slug.
+        data['genre'] = [titles[0]['genre'][1]]
+        assert user_client.post('/api/v1/titles/', data=data).status_code == 201
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM api_titles_genre WHERE genres_id IN '
+                           '(SELECT id FROM api_genres WHERE slug = %s)', [data['genre'][0]])
+            cursor.execute('DELETE FROM api_genres WHERE slug = %s', data['genre'])
+        SlugCache(Genres).invalidate()
+        response = user_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == 400, (
+            'Проверьте, что сброс кэша slug в одном процессе сбрасывает его во всех процессах'
+        )
@@ -0,0 +1,83 @@
+import pytest
+
+from .common import assert_max_queries, auth_client, create_reviews
+
+
+def etag_of(client, url):
+    response = client.get(url)
+    assert response.status_code == 200 and response.has_header('ETag'), (
+        f'Проверьте, что GET запрос `{url}` возвращает заголовок `ETag`'
+    )
+    return response['ETag']
+
+
+class Test14ConditionalGet:
+
+    def check_not_modified(self, client, url, etag):
+        with assert_max_queries(1, f'GET запрос `{url}` с актуальным If-None-Match'):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304 and not response.content, (
+            f'Проверьте, что GET запрос `{url}` с актуальным `If-None-Match` возвращает 304 без тела'
+        )
+        assert response['ETag'] == etag, (
+            f'Проверьте, что ответ 304 на `{url}` содержит тот же `ETag`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_title_etag(self, client, user_client, admin):
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        etag = etag_of(client, url)
+        self.check_not_modified(client, url, etag)
+
+        user_client.patch(url, data={'name': 'Новое название'})
+        assert etag_of(client, url) != etag, (
+            'Проверьте, что изменение произведения меняет `ETag`'
+        )
+        etag = etag_of(client, url)
+        response = client.get(url, HTTP_IF_NONE_MATCH=f'"stale", {etag}')
+        assert response.status_code == 304, (
+            'Проверьте, что `If-None-Match` со списком ETag сравнивается с каждым из них'
+        )
+
+        auth_client(user).delete(f'{url}reviews/{reviews[1]["id"]}/')
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200 and response.json()['rating'] == 4.5, (
+            'Проверьте, что после изменения отзывов `ETag` произведения меняется вместе с рейтингом'
+        )
+        etag = response['ETag']
+        user_client.delete('/api/v1/genres/horror/')
+        assert etag_of(client, url) != etag, (
+            'Проверьте, что удаление жанра меняет `ETag` произведений этого жанра'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_reviews_etag(self, client, user_client, admin):
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        etag = etag_of(client, url)
+        self.check_not_modified(client, url, etag)
+        assert etag_of(client, f'{url}?page_size=1') != etag, (
+            'Проверьте, что разные страницы списка отзывов имеют разные `ETag`'
+        )
+        assert etag_of(client, f'/api/v1/titles/{titles[1]["id"]}/reviews/') != etag, (
+            'Проверьте, что списки отзывов разных произведений имеют разные `ETag`'
+        )
+
+        auth_client(user).patch(f'{url}{reviews[1]["id"]}/', data={'text': 'Исправлено'})
+        assert etag_of(client, url) != etag, (
+            'Проверьте, что изменение отзыва меняет `ETag` списка отзывов'
+        )
+        etag = etag_of(client, url)
+        auth_client(user).patch('/api/v1/users/me/', data={'username': 'Renamed'})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что смена имени автора меняет `ETag` списка его отзывов'
+        )
+        assert response.json()['count'] == 3, (
+            'Проверьте, что список отзывов возвращает количество отзывов произведения'
+        )
+        response = client.get('/api/v1/titles/0/reviews/', HTTP_IF_NONE_MATCH='*')
+        assert response.status_code == 404, (
+            'Проверьте, что для несуществующего произведения возвращается 404, а не 304'
+        )
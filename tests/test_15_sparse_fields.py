@@ -0,0 +1,80 @@
+import pytest
+
+from .common import assert_max_queries, create_comments
+
+
+class Test15SparseFields:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_fields(self, client, user_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(user_client, admin)
+        url = '/api/v1/titles/?fields=id,name,rating'
+        with assert_max_queries(2, f'GET запрос `{url}`') as context:
+            response = client.get(url)
+        assert response.status_code == 200, (
+            f'Проверьте, что при GET запросе `{url}` возвращается статус 200'
+        )
+        results = response.json()['results']
+        assert list(results[0]) == ['id', 'rating', 'name'], (
+            'Проверьте, что `?fields=` оставляет в ответе только запрошенные поля'
+        )
+        assert results[0]['rating'] == 4 and results[0]['id'] == titles[0]['id'], (
+            'Проверьте, что `?fields=` не меняет значения полей'
+        )
+        sql = '\n'.join(query['sql'] for query in context.captured_queries)
+        assert 'description' not in sql and 'api_genres' not in sql, (
+            'Проверьте, что для `?fields=` колонки и жанры, которых нет в ответе, не загружаются'
+        )
+
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        full = client.get(url).json()
+        with assert_max_queries(1, f'GET запрос `{url}?fields=name,year`') as context:
+            response = client.get(f'{url}?fields=name,year')
+        assert response.json() == {'name': full['name'], 'year': full['year']}, (
+            'Проверьте, что `?fields=` работает для отдельного произведения'
+        )
+        assert 'api_categories' not in context.captured_queries[0]['sql'], (
+            'Проверьте, что без поля `category` категория не загружается'
+        )
+        response = client.get(f'{url}?fields=genre,category')
+        assert response.json() == {'category': full['category'], 'genre': full['genre']}, (
+            'Проверьте, что `?fields=` возвращает вложенные поля целиком'
+        )
+        response = client.get('/api/v1/titles/?fields=name,secret')
+        assert response.status_code == 400, (
+            'Проверьте, что неизвестное поле в `?fields=` возвращает статус 400'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_reviews_and_comments_fields(self, client, user_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(user_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/?fields=id,score'
+        with assert_max_queries(2, f'GET запрос `{url}`') as context:
+            response = client.get(url)
+        sql = '\n'.join(query['sql'] for query in context.captured_queries)
+        assert response.status_code == 200, (
+            f'Проверьте, что при GET запросе `{url}` возвращается статус 200'
+        )
+        assert all(list(review) == ['id', 'score'] for review in response.json()['results']), (
+            'Проверьте, что `?fields=` работает для отзывов'
+        )
+        assert '"text"' not in sql and 'api_customuser' not in sql, (
+            'Проверьте, что для отзывов не загружаются текст и автор, если их нет в `?fields=`'
+        )
+
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/comments/?fields=author'
+        response = client.get(url)
+        results = response.json()['results']
+        assert {comment['author'] for comment in results} == {comment['author'] for comment in comments}, (
+            'Проверьте, что `?fields=` работает для комментариев'
+        )
+        assert all(list(comment) == ['author'] for comment in results), (
+            'Проверьте, что `?fields=` оставляет в комментариях только запрошенные поля'
+        )
+        response = user_client.post(
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/?fields=id', data={'text': 'Текст', 'score': 7}
+        )
+        assert response.status_code == 201 and response.json()['text'] == 'Текст', (
+            'Проверьте, что `?fields=` не влияет на изменяющие запросы'
+        )
+
@@ -0,0 +1,161 @@
+import threading
+
+import pytest
+
+from api.autocomplete import completions
+from api.facets import title_facets
+from api.fuzzy import fuzzy_titles
+from api.models import Genres, Titles
+
+from .common import assert_max_queries, auth_client, create_reviews, create_titles
+
+
+class Test16Autocomplete:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_autocomplete(self, client, user_client, admin):
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        response = client.get('/api/v1/autocomplete/?q=пов')
+        assert response.status_code == 200, (
+            'Проверьте, что при GET запросе `/api/v1/autocomplete/` без токена возвращается статус 200'
+        )
+        assert response.json()['titles'] == [
+            {'id': titles[0]['id'], 'name': titles[0]['name'], 'rating': 4}
+        ], (
+            'Проверьте, что `/api/v1/autocomplete/` находит произведения по началу названия'
+        )
+        with assert_max_queries(0, 'Повторный GET запрос `/api/v1/autocomplete/`'):
+            response = client.get('/api/v1/autocomplete/?q=ТУД')
+        assert [title['id'] for title in response.json()['titles']] == [titles[0]['id']], (
+            'Проверьте, что `/api/v1/autocomplete/` ищет с начала любого слова без учёта регистра'
+        )
+        response = client.get('/api/v1/autocomplete/?q=ко')
+        assert response.json()['genres'] == [{'name': 'Комедия', 'slug': 'comedy'}], (
+            'Проверьте, что `/api/v1/autocomplete/` подсказывает жанры'
+        )
+        response = client.get('/api/v1/autocomplete/?q=кн')
+        assert response.json()['categories'] == [{'name': 'Книги', 'slug': 'books'}], (
+            'Проверьте, что `/api/v1/autocomplete/` подсказывает категории'
+        )
+
+        data = {'name': 'Поворот обратно', 'year': 2001, 'genre': ['drama'], 'category': 'films'}
+        created = user_client.post('/api/v1/titles/', data=data).json()
+        auth_client(user).post(f'/api/v1/titles/{created["id"]}/reviews/', data={'text': 'Да', 'score': 9})
+        with assert_max_queries(0, 'GET запрос `/api/v1/autocomplete/` после записи'):
+            response = client.get('/api/v1/autocomplete/?q=поворот')
+        assert [title['id'] for title in response.json()['titles']] == [created['id'], titles[0]['id']], (
+            'Проверьте, что новые произведения и оценки попадают в подсказки без перестройки индекса '
+            'и подсказки упорядочены по рейтингу'
+        )
+        user_client.patch(f'/api/v1/titles/{created["id"]}/', data={'name': 'Разворот'})
+        response = client.get('/api/v1/autocomplete/?q=поворот&limit=1')
+        assert [title['id'] for title in response.json()['titles']] == [titles[0]['id']], (
+            'Проверьте, что переименование произведения обновляет подсказки'
+        )
+        user_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        response = client.get('/api/v1/autocomplete/?q=поворот')
+        assert response.json()['titles'] == [], (
+            'Проверьте, что удалённые произведения пропадают из подсказок'
+        )
+        for url in ('/api/v1/autocomplete/?q=по&limit=0', '/api/v1/autocomplete/?q=по&limit=x'):
+            response = client.get(url)
+            assert response.status_code == 400, (
+                f'Проверьте, что GET запрос `{url}` возвращает статус 400'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_rebuild_concurrency(self, client, user_client, admin, monkeypatch):
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        client.get('/api/v1/autocomplete/?q=пов')
+        load, read = completions.load, completions.read
+        started, release, loads, locked = threading.Event(), threading.Event(), [], []
+
+        def slow_load():
+            state = load()
+            loads.append(state)
+            started.set()
+            release.wait(5)
+            return state
+
+        def checked_read(query):
+            locked.append(completions._lock.locked())
+            return read(query)
+
+        monkeypatch.setattr(completions, 'load', slow_load)
+        monkeypatch.setattr(completions, 'read', checked_read)
+        completions.expire()
+        for _ in range(2):
+            with assert_max_queries(0, 'GET запрос `/api/v1/autocomplete/` к устаревшему индексу'):
+                response = client.get('/api/v1/autocomplete/?q=пов')
+            assert started.wait(5)
+            assert [title['id'] for title in response.json()['titles']] == [titles[0]['id']], (
+                'Проверьте, что во время перестройки индекса подсказки отдаются по старому состоянию, '
+                'а перестройка идёт в фоне'
+            )
+        # Изменения закоммичены после того, как load() прочитал базу.
+        completions.set_title(titles[1]['id'], 'Поворот назад', None)
+        completions.remove_title(titles[0]['id'])
+        Titles.shift_rating(titles[1]['id'], 10, 1)
+        completions.shift_rating(titles[1]['id'], 10, 1)
+        release.set()
+        completions.join(5)
+        assert len(loads) == 1, (
+            'Проверьте, что индекс перестраивает только один поток'
+        )
+        response = client.get('/api/v1/autocomplete/?q=поворот')
+        assert [title['id'] for title in response.json()['titles']] == [titles[1]['id']], (
+            'Проверьте, что изменения, внесённые во время перестройки индекса, не теряются'
+        )
+        title = Titles.objects.get(pk=titles[1]['id'])
+        assert response.json()['titles'][0]['rating'] == title.score_sum / title.review_count, (
+            'Проверьте, что рейтинг, изменённый во время перестройки индекса, перечитывается из базы'
+        )
+        assert len(locked) == 2 and not any(locked), (
+            'Проверьте, что индекс читает базу, не удерживая блокировку индекса'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_deleted_titles(self, client, user_client, monkeypatch):
+        titles, categories, genres = create_titles(user_client)
+        for index in (completions, fuzzy_titles, title_facets):
+            index.rebuild()
+            # Без перестройки индексы должны узнать об удалении из сигнала.
+            monkeypatch.setattr(index, 'expire', lambda: None)
+            monkeypatch.setattr(index, 'ensure_built', lambda: None)
+        user_client.delete(f'/api/v1/categories/{categories[0]["slug"]}/')
+        Titles.objects.filter(pk=titles[1]['id']).delete()
+        for name in ('Поворот туда', 'Проект'):
+            assert completions.complete(name)['titles'] == [], (
+                'Проверьте, что произведения, удалённые каскадом и через ORM, пропадают из автодополнения'
+            )
+            assert fuzzy_titles.search(name) == [], (
+                'Проверьте, что произведения, удалённые каскадом и через ORM, пропадают из поиска с опечатками'
+            )
+        assert title_facets.counts({})['count'] == 0, (
+            'Проверьте, что произведения, удалённые каскадом и через ORM, пропадают из фасетов'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_group_changes(self, client, user_client, monkeypatch):
+        titles, categories, genres = create_titles(user_client)
+        for index in (completions, title_facets):
+            index.rebuild()
+            # Изменения жанров и категорий не должны перестраивать индексы.
+            monkeypatch.setattr(index, 'load', None)
+        Genres.objects.create(name='Поэзия', slug='poetry')
+        assert completions.complete('поэ')['genres'] == [{'name': 'Поэзия', 'slug': 'poetry'}], (
+            'Проверьте, что жанр, созданный через ORM, попадает в автодополнение'
+        )
+        user_client.delete(f'/api/v1/genres/{genres[0]["slug"]}/')
+        assert completions.complete(genres[0]['name'])['genres'] == [], (
+            'Проверьте, что удалённый жанр пропадает из автодополнения'
+        )
+        response = client.get('/api/v1/titles/facets/')
+        genre_counts = {item['slug']: item['count'] for item in response.json()['genre']}
+        assert genre_counts == {'comedy': 1, 'drama': 1, 'poetry': 0}, (
+            'Проверьте, что удалённый жанр пропадает из фасетов, а произведения остаются в остальных жанрах'
+        )
+        response = client.get('/api/v1/titles/facets/?genre=comedy')
+        assert response.json()['count'] == 1, (
+            'Проверьте, что произведения удалённого жанра остаются в фасетах других жанров'
+        )
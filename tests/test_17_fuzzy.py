@@ -0,0 +1,42 @@
+import pytest
+
+from .common import create_titles
+
+
+class Test17Fuzzy:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_fuzzy_search(self, client, user_client):
+        titles, _, _ = create_titles(user_client)
+        response = client.get('/api/v1/titles/?fuzzy=Поварот')
+        assert response.status_code == 200, (
+            'Проверьте, что при GET запросе `/api/v1/titles/?fuzzy=` без токена возвращается статус 200'
+        )
+        assert [title['id'] for title in response.json()['results']] == [titles[0]['id']], (
+            'Проверьте, что `/api/v1/titles/?fuzzy=` находит произведения с опечаткой в названии'
+        )
+        response = client.get('/api/v1/titles/?fuzzy=совсем другое')
+        assert response.json()['results'] == [], (
+            'Проверьте, что `/api/v1/titles/?fuzzy=` не возвращает непохожие названия'
+        )
+
+        data = {'name': 'Поворот не туда', 'year': 2001, 'genre': ['drama'], 'category': 'films'}
+        created = user_client.post('/api/v1/titles/', data=data).json()
+        response = client.get('/api/v1/titles/?fuzzy=поварот')
+        assert [title['id'] for title in response.json()['results']] == [titles[0]['id'], created['id']], (
+            'Проверьте, что новые произведения попадают в нечёткий поиск'
+        )
+        response = client.get('/api/v1/titles/?fuzzy=поВарот не')
+        assert [title['id'] for title in response.json()['results']] == [created['id']], (
+            'Проверьте, что при наличии близких совпадений `/api/v1/titles/?fuzzy=` возвращает только их'
+        )
+        user_client.patch(f'/api/v1/titles/{created["id"]}/', data={'name': 'Разворот'})
+        user_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        response = client.get('/api/v1/titles/?fuzzy=Поварот')
+        assert response.json()['results'] == [], (
+            'Проверьте, что переименованные и удалённые произведения пропадают из нечёткого поиска'
+        )
+        response = client.get('/api/v1/titles/?fuzzy=Розворот')
+        assert [title['id'] for title in response.json()['results']] == [created['id']], (
+            'Проверьте, что переименование произведения обновляет нечёткий поиск'
+        )
@@ -0,0 +1,116 @@
+import pytest
+from django.db import connection
+from django.test import override_settings
+
+from .common import assert_max_queries, auth_client, create_comments
+
+pytestmark = pytest.mark.skipif(connection.vendor != 'sqlite',
+                                reason='Полнотекстовый индекс есть только в SQLite')
+
+
+def found(response):
+    return [item['id'] for item in response.json()['results']]
+
+
+class Test18TextSearch:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_review_search(self, client, user_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(user_client, admin)
+        url = f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+        first = auth_client(user).post(url, data={
+            'text': 'Сюжет про ёлку, ёлка в каждой сцене', 'score': 7}).json()
+        second = auth_client(moderator).post(url, data={
+            'text': 'Длинный отзыв: актёры, музыка, декорации и где-то на фоне ёлка', 'score': 5}).json()
+
+        response = client.get('/api/v1/search/reviews/?q=елка')
+        assert response.status_code == 200, (
+            'Проверьте, что при GET запросе `/api/v1/search/reviews/` без токена возвращается статус 200'
+        )
+        assert found(response) == [first['id'], second['id']], (
+            'Проверьте, что `/api/v1/search/reviews/` находит отзывы без учёта «ё» '
+            'и упорядочивает их по релевантности'
+        )
+        item = response.json()['results'][0]
+        assert item['author'] == user.username and item['title'] == titles[1]['id'] and item['score'] == 7, (
+            'Проверьте, что `/api/v1/search/reviews/` возвращает автора, произведение и оценку отзыва'
+        )
+        assert '**ёлка**' in item['snippet'], (
+            'Проверьте, что `/api/v1/search/reviews/` выделяет найденные слова во фрагменте текста'
+        )
+        assert response.json()['count'] is None, (
+            'Проверьте, что `/api/v1/search/reviews/` не считает общее число совпадений'
+        )
+
+        with override_settings(TEXT_SEARCH_WINDOW=1):
+            response = client.get('/api/v1/search/reviews/?q=елка')
+        assert found(response) == [second['id']], (
+            'Проверьте, что без фильтров `/api/v1/search/reviews/` ранжирует только '
+            'TEXT_SEARCH_WINDOW последних совпадений'
+        )
+        response = client.get(f'/api/v1/search/reviews/?q=елка&author={moderator.username}')
+        assert found(response) == [second['id']], (
+            'Проверьте, что `/api/v1/search/reviews/` фильтрует по автору'
+        )
+        response = client.get(f'/api/v1/search/reviews/?q=qwerty&title={titles[1]["id"]}')
+        assert found(response) == [], (
+            'Проверьте, что `/api/v1/search/reviews/` фильтрует по произведению'
+        )
+        response = client.get('/api/v1/search/reviews/')
+        assert response.status_code == 400, (
+            'Проверьте, что GET запрос `/api/v1/search/reviews/` без `q` возвращает статус 400'
+        )
+
+        auth_client(user).patch(f'{url}{first["id"]}/', data={'text': 'Про зиму'})
+        user_client.delete(f'{url}{second["id"]}/')
+        response = client.get('/api/v1/search/reviews/?q=елка')
+        assert found(response) == [], (
+            'Проверьте, что изменённые и удалённые отзывы пропадают из поиска'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_comment_search(self, client, user_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(user_client, admin)
+        response = client.get(f'/api/v1/search/comments/?q=qwerty123&review={reviews[0]["id"]}')
+        assert response.status_code == 200, (
+            'Проверьте, что при GET запросе `/api/v1/search/comments/` без токена возвращается статус 200'
+        )
+        assert found(response) == [comments[1]['id']], (
+            'Проверьте, что `/api/v1/search/comments/` находит комментарии по тексту и фильтрует по отзыву'
+        )
+        assert response.json()['results'][0]['title'] == titles[0]['id'], (
+            'Проверьте, что `/api/v1/search/comments/` возвращает произведение комментария'
+        )
+        response = client.get(f'/api/v1/search/comments/?q=qwerty&title={titles[1]["id"]}')
+        assert found(response) == [], (
+            'Проверьте, что `/api/v1/search/comments/` фильтрует по произведению'
+        )
+        url = f'/api/v1/search/comments/?q=qwerty&title={titles[0]["id"]}'
+        with assert_max_queries(1, f'GET запрос `{url}`') as context:
+            response = client.get(url)
+        assert found(response) == [comments[0]['id']], (
+            'Проверьте, что `/api/v1/search/comments/` находит комментарии к отзывам произведения'
+        )
+        assert ' OR ' not in context.captured_queries[0]['sql'], (
+            'Проверьте, что фильтр по произведению не перечисляет его отзывы в запросе FTS5'
+        )
+        response = client.get(f'{url}&review={reviews[1]["id"]}')
+        assert found(response) == [], (
+            'Проверьте, что `/api/v1/search/comments/` учитывает фильтры по отзыву и произведению вместе'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_admin_search(self, client, user_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(user_client, admin)
+        client.force_login(admin)
+        response = client.get('/admin/api/review/?q=qwerty123')
+        assert response.status_code == 200, (
+            'Проверьте, что поиск по отзывам в админке возвращает статус 200'
+        )
+        assert [review.pk for review in response.context['cl'].result_list] == [reviews[1]['id']], (
+            'Проверьте, что поиск по отзывам в админке использует полнотекстовый индекс'
+        )
+        response = client.get('/admin/api/comment/?q=qwerty321')
+        assert [comment.pk for comment in response.context['cl'].result_list] == [comments[2]['id']], (
+            'Проверьте, что поиск по комментариям в админке использует полнотекстовый индекс'
+        )
@@ -0,0 +1,85 @@
+import pytest
+
+from .common import assert_max_queries, create_titles
+
+
+def counts(response, facet):
+    key = 'year' if facet == 'year' else 'slug'
+    return {item[key]: item['count'] for item in response.json()[facet]}
+
+
+class Test19Facets:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_facets(self, client, user_client):
+        titles, categories, genres = create_titles(user_client)
+        response = client.get('/api/v1/titles/facets/')
+        assert response.status_code == 200, (
+            'Проверьте, что при GET запросе `/api/v1/titles/facets/` без токена возвращается статус 200'
+        )
+        assert response.json()['count'] == 2, (
+            'Проверьте, что `/api/v1/titles/facets/` возвращает число подходящих произведений'
+        )
+        assert counts(response, 'genre') == {'horror': 1, 'comedy': 1, 'drama': 1}, (
+            'Проверьте, что `/api/v1/titles/facets/` считает произведения каждого жанра'
+        )
+        assert counts(response, 'category') == {'films': 1, 'books': 1}, (
+            'Проверьте, что `/api/v1/titles/facets/` считает произведения каждой категории'
+        )
+        assert counts(response, 'year') == {2000: 1, 2020: 1}, (
+            'Проверьте, что `/api/v1/titles/facets/` считает произведения каждого года'
+        )
+
+        with assert_max_queries(0, 'GET запрос `/api/v1/titles/facets/` с фильтрами по фасетам'):
+            response = client.get('/api/v1/titles/facets/?genre=horror')
+        assert response.json()['count'] == 1 and counts(response, 'genre') == {
+            'horror': 1, 'comedy': 1, 'drama': 0
+        } and counts(response, 'year') == {2000: 1, 2020: 0}, (
+            'Проверьте, что `/api/v1/titles/facets/` считает значения среди отфильтрованных произведений '
+            'и возвращает значения без произведений'
+        )
+        response = client.get('/api/v1/titles/facets/?genre=horror&year=2000&category=films')
+        assert counts(response, 'category') == {'films': 1, 'books': 0}, (
+            'Проверьте, что `/api/v1/titles/facets/` учитывает несколько фильтров'
+        )
+        response = client.get('/api/v1/titles/facets/?genre=horror&category=books')
+        assert response.json()['count'] == 0, (
+            'Проверьте, что `/api/v1/titles/facets/` учитывает несколько фильтров'
+        )
+        response = client.get('/api/v1/titles/facets/?genre=unknown')
+        assert response.json()['count'] == 0, (
+            'Проверьте, что `/api/v1/titles/facets/` с несуществующим жанром ничего не находит'
+        )
+        response = client.get('/api/v1/titles/facets/?name=проект')
+        assert response.json()['count'] == 1 and counts(response, 'genre')['drama'] == 1, (
+            'Проверьте, что `/api/v1/titles/facets/` поддерживает текстовые фильтры списка'
+        )
+        for url in ('/api/v1/titles/facets/?search=драма', '/api/v1/titles/facets/?fuzzy=прокет'):
+            response = client.get(url)
+            assert response.json()['count'] == 1, (
+                f'Проверьте, что GET запрос `{url}` учитывает поиск'
+            )
+        response = client.get('/api/v1/titles/facets/?year=x')
+        assert response.status_code == 400, (
+            'Проверьте, что GET запрос `/api/v1/titles/facets/?year=x` возвращает статус 400'
+        )
+
+        data = {'name': 'Поворот обратно', 'year': 2020, 'genre': ['drama'], 'category': 'films'}
+        created = user_client.post('/api/v1/titles/', data=data).json()
+        user_client.post('/api/v1/genres/', data={'name': 'Вестерн', 'slug': 'western'})
+        user_client.patch(f'/api/v1/titles/{titles[0]["id"]}/', data={'genre': ['western']})
+        with assert_max_queries(0, 'GET запрос `/api/v1/titles/facets/` после записи'):
+            response = client.get('/api/v1/titles/facets/?category=films')
+        assert counts(response, 'genre') == {'horror': 0, 'comedy': 0, 'drama': 1, 'western': 1}, (
+            'Проверьте, что новые и изменённые произведения и жанры попадают в фасеты без перестройки'
+        )
+        user_client.delete(f'/api/v1/titles/{created["id"]}/')
+        response = client.get('/api/v1/titles/facets/?year=2020')
+        assert counts(response, 'category') == {'films': 0, 'books': 1}, (
+            'Проверьте, что удалённые произведения пропадают из фасетов'
+        )
+        user_client.delete('/api/v1/categories/books/')
+        response = client.get('/api/v1/titles/facets/')
+        assert response.json()['count'] == 1 and counts(response, 'year') == {2000: 1}, (
+            'Проверьте, что удаление категории вместе с произведениями обновляет фасеты'
+        )